@@ -0,0 +1,315 @@
+# === ALMACENAMIENTO DE RESPUESTAS ===
+# Interfaz común para donde viven las respuestas. El formulario (vía la cola
+# de envíos) solo agrega filas y el dashboard solo las lee; ninguno depende
+# de gspread directamente.
+#
+#   agregar_filas(filas)   agrega filas al final
+#   leer_todo()            [encabezados] + filas, como get_all_values
+#   leer_desde(n)          (encabezados, filas a partir de la fila de datos n, base 0)
+#   contar_filas()         cantidad de filas de datos
+#   revision()             valor barato que cambia cuando cambian los datos;
+#                          sirve para no pedir filas si nada cambió
+#
+# Los valores se devuelven siempre como texto ("" para celdas vacías), igual
+# que Google Sheets, para que el resto del código no distinga el origen.
+#
+# Implementaciones:
+#   AlmacenamientoSheets   la hoja de Google (producción)
+#   AlmacenamientoSQLite   un archivo local, sin cuota, para volúmenes altos
+#   AlmacenamientoMemoria  imita la latencia y la cuota de la API de Sheets,
+#                          para pruebas de carga y benchmarks sin conexión
+#
+# El tipo se elige con la variable de entorno ENCUESTA_ALMACENAMIENTO
+# ("sheets", "sqlite" o "memoria"); por defecto, Google Sheets.
+
+import json
+import os
+from abc import ABC, abstractmethod
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from gspread.utils import rowcol_to_a1
+
+from catalogo import COLUMNAS
+from conexion_sheets import con_reconexion, invalidar_conexion, obtener_hoja
+from limitador import LIMITADOR_ESCRITURAS, CuboTokens, codigo_http
+from metricas import medir
+
+VARIABLE_TIPO = "ENCUESTA_ALMACENAMIENTO"
+HOJA_PREDETERMINADA = "Respuestas"
+RUTA_SQLITE = "respuestas.db"
+
+# Valores de referencia de la API de Sheets (por usuario y por minuto)
+LECTURAS_POR_MINUTO = 60
+ESCRITURAS_POR_MINUTO = 60
+LATENCIA_LECTURA = 0.3
+LATENCIA_ESCRITURA = 0.6
+
+
+def _como_texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _fila_texto(fila):
+    return [_como_texto(valor) for valor in fila]
+
+
+def _columna_final(ancho):
+    return rowcol_to_a1(1, max(ancho, 1)).rstrip("0123456789")
+
+
+# Una implementación incompleta falla al crearla, no a mitad de un vaciado
+class Almacenamiento(ABC):
+    # Límite de escrituras que debe respetar quien escribe (None = sin límite)
+    limitador = None
+
+    @abstractmethod
+    def agregar_filas(self, filas):
+        ...
+
+    @abstractmethod
+    def leer_todo(self):
+        ...
+
+    @abstractmethod
+    def leer_desde(self, fila):
+        ...
+
+    @abstractmethod
+    def contar_filas(self):
+        ...
+
+    def revision(self):
+        # Sin algo más barato, la cantidad de filas (solo se agregan filas al final)
+        return self.contar_filas()
+
+    def reconectar(self):
+        # Se llama tras un error de conexión; las implementaciones locales no hacen nada
+        pass
+
+
+# === GOOGLE SHEETS ===
+class AlmacenamientoSheets(Almacenamiento):
+    limitador = LIMITADOR_ESCRITURAS
+
+    def __init__(self, nombre_hoja=None):
+        # nombre_hoja=None corresponde a la primera hoja (sheet1)
+        self.nombre_hoja = nombre_hoja
+        self._revision_drive = True
+
+    def _hoja(self):
+        try:
+            return obtener_hoja(self.nombre_hoja)
+        except Exception as error:
+            raise ConnectionError("No se pudo conectar con Google Sheets") from error
+
+    def _con_reconexion(self, operacion):
+        return con_reconexion(operacion, self.nombre_hoja)
+
+    def agregar_filas(self, filas):
+        # Sin reintento aquí: la cola decide cuándo y cómo reintentar
+        hoja = self._hoja()
+        with medir("sheets_append"):
+            hoja.append_rows(filas)
+
+    def leer_todo(self):
+        with medir("sheets_leer_todo"):
+            return self._con_reconexion(lambda hoja: hoja.get_all_values())
+
+    def leer_desde(self, fila):
+        # Una sola llamada: encabezados y filas desde la indicada
+        def leer(hoja):
+            final = _columna_final(hoja.col_count)
+            encabezados, filas = hoja.batch_get(["1:1", f"A{fila + 2}:{final}"])
+            return (encabezados[0] if encabezados else []), [list(f) for f in filas]
+        with medir("sheets_leer_desde"):
+            return self._con_reconexion(leer)
+
+    def contar_filas(self):
+        # La primera columna (Fecha y hora) nunca está vacía
+        with medir("sheets_contar"):
+            return max(len(self._con_reconexion(lambda hoja: hoja.col_values(1))) - 1, 0)
+
+    def revision(self):
+        # modifiedTime del libro en Drive: una llamada pequeña que no gasta
+        # cuota de lectura de Sheets. Si la cuenta no tiene acceso a Drive
+        # (403/404) se pasa a contar filas durante el resto del proceso
+        if self._revision_drive:
+            try:
+                with medir("drive_revision"):
+                    return self._con_reconexion(lambda hoja: hoja.spreadsheet.get_lastUpdateTime())
+            except Exception as error:
+                if codigo_http(error) not in (403, 404):
+                    raise
+                self._revision_drive = False
+        return self.contar_filas()
+
+    def reconectar(self):
+        invalidar_conexion()
+
+
+# === SQLITE LOCAL ===
+class AlmacenamientoSQLite(Almacenamiento):
+    def __init__(self, ruta=RUTA_SQLITE, nombre_hoja=None, encabezados=COLUMNAS):
+        self.hoja = nombre_hoja or HOJA_PREDETERMINADA
+        self._conexion = sqlite3.connect(ruta, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS hojas (hoja TEXT PRIMARY KEY, encabezados TEXT NOT NULL)"
+        )
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS filas ("
+            " hoja TEXT NOT NULL,"
+            " numero INTEGER NOT NULL,"
+            " datos TEXT NOT NULL,"
+            " PRIMARY KEY (hoja, numero)) WITHOUT ROWID"
+        )
+        self._conexion.execute(
+            "INSERT OR IGNORE INTO hojas (hoja, encabezados) VALUES (?, ?)",
+            (self.hoja, json.dumps(list(encabezados), ensure_ascii=False)),
+        )
+        self._bloqueo = threading.Lock()
+
+    def _encabezados(self):
+        fila = self._conexion.execute("SELECT encabezados FROM hojas WHERE hoja = ?", (self.hoja,)).fetchone()
+        return json.loads(fila[0])
+
+    def _contar(self):
+        return self._conexion.execute(
+            "SELECT COALESCE(MAX(numero), 0) FROM filas WHERE hoja = ?", (self.hoja,)
+        ).fetchone()[0]
+
+    def agregar_filas(self, filas):
+        with self._bloqueo:
+            self._conexion.execute("BEGIN IMMEDIATE")
+            try:
+                inicio = self._contar()
+                self._conexion.executemany(
+                    "INSERT INTO filas (hoja, numero, datos) VALUES (?, ?, ?)",
+                    [
+                        (self.hoja, inicio + posicion, json.dumps(_fila_texto(fila), ensure_ascii=False))
+                        for posicion, fila in enumerate(filas, start=1)
+                    ],
+                )
+                self._conexion.execute("COMMIT")
+            except Exception:
+                self._conexion.execute("ROLLBACK")
+                raise
+
+    def leer_todo(self):
+        encabezados, filas = self.leer_desde(0)
+        return [encabezados] + filas
+
+    def leer_desde(self, fila):
+        with self._bloqueo:
+            encabezados = self._encabezados()
+            filas = self._conexion.execute(
+                "SELECT datos FROM filas WHERE hoja = ? AND numero > ? ORDER BY numero",
+                (self.hoja, fila),
+            ).fetchall()
+        return encabezados, [json.loads(datos) for (datos,) in filas]
+
+    def contar_filas(self):
+        with self._bloqueo:
+            return self._contar()
+
+
+# === SIMULACIÓN EN MEMORIA ===
+class ErrorCuota(Exception):
+    # Misma forma que gspread.exceptions.APIError para limitador.codigo_http
+    class _Respuesta:
+        status_code = 429
+
+    response = _Respuesta()
+
+
+class AlmacenamientoMemoria(Almacenamiento):
+    def __init__(self, encabezados=COLUMNAS, latencia_lectura=LATENCIA_LECTURA,
+                 latencia_escritura=LATENCIA_ESCRITURA, lecturas_por_minuto=LECTURAS_POR_MINUTO,
+                 escrituras_por_minuto=ESCRITURAS_POR_MINUTO, semilla=None):
+        # Con latencias en 0 y cuotas en None se comporta como una lista simple
+        self.encabezados = list(encabezados)
+        self.filas = []
+        self.latencia_lectura = latencia_lectura
+        self.latencia_escritura = latencia_escritura
+        self.cuotas = {"lectura": lecturas_por_minuto, "escritura": escrituras_por_minuto}
+        self.limitador = CuboTokens(escrituras_por_minuto) if escrituras_por_minuto else None
+        self.llamadas = {"lectura": 0, "escritura": 0, "rechazadas": 0, "sondeo": 0}
+        self._ventanas = {"lectura": deque(), "escritura": deque()}
+        self._azar = random.Random(semilla)
+        self._bloqueo = threading.Lock()
+
+    def _llamada(self, tipo, latencia):
+        with self._bloqueo:
+            ahora = time.monotonic()
+            ventana = self._ventanas[tipo]
+            while ventana and ahora - ventana[0] >= 60:
+                ventana.popleft()
+            if self.cuotas[tipo] and len(ventana) >= self.cuotas[tipo]:
+                self.llamadas["rechazadas"] += 1
+                raise ErrorCuota(f"Cuota de {tipo} por minuto agotada")
+            ventana.append(ahora)
+            self.llamadas[tipo] += 1
+            espera = latencia * self._azar.uniform(0.5, 1.5)
+        if espera:
+            time.sleep(espera)
+
+    def agregar_filas(self, filas):
+        self._llamada("escritura", self.latencia_escritura)
+        with self._bloqueo:
+            self.filas.extend(_fila_texto(fila) for fila in filas)
+
+    def leer_todo(self):
+        self._llamada("lectura", self.latencia_lectura)
+        with self._bloqueo:
+            return [list(self.encabezados)] + [list(fila) for fila in self.filas]
+
+    def leer_desde(self, fila):
+        self._llamada("lectura", self.latencia_lectura)
+        with self._bloqueo:
+            return list(self.encabezados), [list(f) for f in self.filas[fila:]]
+
+    def contar_filas(self):
+        self._llamada("lectura", self.latencia_lectura)
+        with self._bloqueo:
+            return len(self.filas)
+
+    def revision(self):
+        # Como el modifiedTime de Drive: sin latencia apreciable ni cuota de Sheets
+        with self._bloqueo:
+            self.llamadas["sondeo"] += 1
+            return len(self.filas)
+
+
+# Una instancia por hoja y proceso, para que formulario y dashboard
+# compartan los datos cuando corren juntos (pruebas de carga)
+_MEMORIA = {}
+_bloqueo_memoria = threading.Lock()
+
+
+def crear_almacenamiento(nombre_hoja=None, tipo=None):
+    tipo = tipo or os.environ.get(VARIABLE_TIPO, "sheets")
+    if tipo == "sheets":
+        return AlmacenamientoSheets(nombre_hoja)
+    if tipo == "sqlite":
+        return AlmacenamientoSQLite(nombre_hoja=nombre_hoja)
+    if tipo == "memoria":
+        with _bloqueo_memoria:
+            clave = nombre_hoja or HOJA_PREDETERMINADA
+            if clave not in _MEMORIA:
+                _MEMORIA[clave] = AlmacenamientoMemoria()
+            return _MEMORIA[clave]
+    raise ValueError(f"Tipo de almacenamiento desconocido: {tipo}")
+
+
+def descartar_memoria(nombre_hoja=None):
+    # La próxima crear_almacenamiento(tipo="memoria") empieza una hoja vacía
+    with _bloqueo_memoria:
+        _MEMORIA.pop(nombre_hoja or HOJA_PREDETERMINADA, None)
@@ -0,0 +1,205 @@
+# === BENCHMARK DEL DASHBOARD CON DATOS SINTÉTICOS ===
+# Uso: python benchmark_dashboard.py [--filas 1000 10000 100000 1000000] [--memoria] [--salida b.json]
+#
+# Mide cada etapa del dashboard con respuestas generadas por
+# datos_sinteticos.generar_filas(), con las mismas columnas y códigos que
+# escribe app.py:
+#
+#   carga        lectura del almacenamiento, tipado y escritura del espejo
+#   espejo       arranque desde el espejo Parquet (reinicio del proceso)
+#   indicadores  matriz de selección múltiple
+#   indice       índice de filtros (máscaras, rangos de edad y fecha)
+#   filtro       conteos de los seis gráficos para cada distrito
+#   serie        conteos por día desde cero (arranque del proceso)
+#   serie_nuevas actualización de la serie con NUEVAS filas recién llegadas
+#   texto        índice invertido de las respuestas abiertas desde cero
+#   texto_nuevas actualización del índice con NUEVAS filas recién llegadas
+#   busqueda     una búsqueda de dos palabras y los términos por distrito
+#   graficos     figuras de plotly serializadas, como hace st.plotly_chart
+#   rejilla      celda geohash de cada respuesta y conteos por celda
+#   mapa_zonas   HTML del mapa de zonas con sus capas (desde la rejilla)
+#   mapa_puntos  HTML del mapa de puntos agrupados
+#   mapa_calor   HTML del mapa de calor (desde la rejilla)
+#
+# Cada escala corre en un proceso aparte, así la memoria de una no afecta a
+# la siguiente y una escala que agota la memoria no detiene las demás. Con
+# --memoria se agrega el pico de memoria de cada etapa (tracemalloc), que
+# hace más lentas las mediciones de tiempo.
+
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+import plotly.express as px
+
+from almacenamiento import AlmacenamientoMemoria
+from busqueda import IndiceTexto
+from filtros import IndiceFiltros
+from graficos import secciones_terminos
+from datos_sinteticos import generar_filas
+from espejo_local import EspejoRespuestas
+from indicadores import matriz_indicadores
+from serie_temporal import SerieTemporal
+from mapas import coordenadas, construir_mapa, construir_mapa_zonas, MODO_PUNTOS, MODO_CALOR
+from rejilla import RejillaEspacial
+from sincronizacion import SincronizadorRespuestas
+
+ESCALAS = [1_000, 10_000, 100_000, 1_000_000]
+SEMILLA = 1
+NUEVAS = 50
+ETAPAS = ["carga", "espejo", "indicadores", "indice", "filtro", "serie", "serie_nuevas", "texto", "texto_nuevas",
+          "busqueda", "graficos", "rejilla", "mapa_zonas", "mapa_puntos", "mapa_calor"]
+# Las mismas preguntas que grafica dashboard.py
+COLUMNAS_GRAFICOS = [
+    ("Percepción de seguridad", "pie"),
+    ("Factores de inseguridad (selección múltiple)", "bar"),
+    ("Tipo de delito", "bar"),
+    ("Victimización", "pie"),
+    ("Modo de operar delictivo", "bar"),
+    ("Horario del hecho", "line"),
+]
+
+
+def _figuras(indice, mascara=None):
+    tamano = 0
+    for columna, tipo in COLUMNAS_GRAFICOS:
+        conteos = indice.conteos(columna, mascara)
+        if conteos.empty:
+            continue
+        if tipo == "pie":
+            figura = px.pie(names=conteos.index, values=conteos.values, title=columna, hole=0.4)
+        else:
+            datos = conteos.rename_axis("Opción").reset_index(name="count")
+            figura = (px.bar if tipo == "bar" else px.line)(datos, x="Opción", y="count", title=columna)
+            figura.update_layout(yaxis=dict(tickmode="linear", dtick=1))
+        tamano += len(figura.to_json())
+    return tamano
+
+
+def medir_escala(filas, memoria=False):
+    resultados = {"filas": filas, "segundos": {}, "memoria_mb": {}, "tamanos": {}}
+
+    def etapa(nombre, funcion):
+        gc.collect()
+        if memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        valor = funcion()
+        resultados["segundos"][nombre] = round(time.perf_counter() - inicio, 4)
+        if memoria:
+            resultados["memoria_mb"][nombre] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+            tracemalloc.stop()
+        return valor
+
+    inicio = time.perf_counter()
+    generadas = generar_filas(filas, SEMILLA)
+    almacen = AlmacenamientoMemoria(
+        encabezados=list(generadas.columns), latencia_lectura=0, latencia_escritura=0,
+        lecturas_por_minuto=None, escrituras_por_minuto=None,
+    )
+    almacen.filas = generadas.to_numpy().tolist()
+    del generadas
+    resultados["generacion_s"] = round(time.perf_counter() - inicio, 2)
+
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as directorio:
+        sincronizador = SincronizadorRespuestas(almacen, espejo=EspejoRespuestas(directorio))
+        df = etapa("carga", sincronizador.actualizar)
+        almacen.filas = []
+        etapa("espejo", sincronizador.espejo.leer)
+
+    indicadores = etapa("indicadores", lambda: matriz_indicadores(df))
+    indice = etapa("indice", lambda: IndiceFiltros(df, indicadores))
+    etapa("filtro", lambda: [
+        indice.conteos(columna, mascara)
+        for mascara in [None] + [indice.mascara({"Distrito": [d]}) for d in indice.valores("Distrito")]
+        for columna, _ in COLUMNAS_GRAFICOS
+    ])
+    etapa("serie", lambda: SerieTemporal().actualizar(df))
+    serie = SerieTemporal()
+    serie.actualizar(df.iloc[:-NUEVAS])
+    etapa("serie_nuevas", lambda: serie.actualizar(df))
+    etapa("texto", lambda: IndiceTexto().actualizar(df))
+    indice_texto = IndiceTexto()
+    indice_texto.actualizar(df.iloc[:-NUEVAS])
+    etapa("texto_nuevas", lambda: indice_texto.actualizar(df))
+    etapa("busqueda", lambda: secciones_terminos(indice_texto, indice, indice_texto.mascara("más patrullaje")))
+    resultados["tamanos"]["graficos_bytes"] = etapa("graficos", lambda: _figuras(indice))
+    rejilla = etapa("rejilla", lambda: RejillaEspacial(df, indicadores))
+    mapas = {
+        "mapa_zonas": lambda: construir_mapa_zonas(rejilla.zonas(), rejilla.calor()),
+        "mapa_puntos": lambda: construir_mapa(coordenadas(df), MODO_PUNTOS),
+        "mapa_calor": lambda: construir_mapa(rejilla.calor(), MODO_CALOR),
+    }
+    for nombre, construir in mapas.items():
+        html = etapa(nombre, lambda: construir().get_root().render())
+        resultados["tamanos"][f"{nombre}_bytes"] = len(html)
+
+    resultados["df_mb"] = round(df.memory_usage(deep=True).sum() / 2**20, 1)
+    # ru_maxrss está en KB en Linux
+    resultados["pico_proceso_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return resultados
+
+
+def ejecutar(escalas, memoria=False):
+    reporte = {
+        "configuracion": {
+            "semilla": SEMILLA,
+            "memoria_por_etapa": memoria,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "cpus": os.cpu_count(),
+        },
+        "escalas": [],
+    }
+    for filas in escalas:
+        comando = [sys.executable, os.path.abspath(__file__), "--una-escala", str(filas)]
+        if memoria:
+            comando.append("--memoria")
+        proceso = subprocess.run(comando, capture_output=True, text=True)
+        if proceso.returncode != 0:
+            reporte["escalas"].append({"filas": filas, "error": f"código {proceso.returncode}",
+                                       "detalle": proceso.stderr.strip().splitlines()[-1:]})
+        else:
+            reporte["escalas"].append(json.loads(proceso.stdout.strip().splitlines()[-1]))
+        imprimir_escala(reporte["escalas"][-1])
+    return reporte
+
+
+def imprimir_escala(resultado):
+    if "error" in resultado:
+        print(f"{resultado['filas']:>9} filas: falló ({resultado['error']}) {' '.join(resultado['detalle'])}")
+        return
+    tiempos = "  ".join(f"{nombre} {resultado['segundos'][nombre]:.3f}" for nombre in ETAPAS)
+    print(f"{resultado['filas']:>9} filas: {tiempos}  (s)")
+    if resultado["memoria_mb"]:
+        picos = "  ".join(f"{nombre} {resultado['memoria_mb'][nombre]}" for nombre in ETAPAS)
+        print(f"{'':>16}{picos}  (MB pico)")
+    print(f"{'':>16}df {resultado['df_mb']} MB · proceso {resultado['pico_proceso_mb']} MB · "
+          f"HTML mapa de zonas {resultado['tamanos']['mapa_zonas_bytes'] / 2**20:.1f} MB, "
+          f"de puntos {resultado['tamanos']['mapa_puntos_bytes'] / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de las etapas del dashboard con datos sintéticos.")
+    parser.add_argument("--filas", type=int, nargs="+", default=ESCALAS, help="Escalas a medir")
+    parser.add_argument("--memoria", action="store_true", help="Mide el pico de memoria de cada etapa")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el reporte")
+    parser.add_argument("--una-escala", type=int, help=argparse.SUPPRESS)
+    argumentos = parser.parse_args()
+
+    if argumentos.una_escala:
+        print(json.dumps(medir_escala(argumentos.una_escala, argumentos.memoria)))
+    else:
+        reporte = ejecutar(argumentos.filas, argumentos.memoria)
+        if argumentos.salida:
+            with open(argumentos.salida, "w", encoding="utf-8") as archivo:
+                json.dump(reporte, archivo, ensure_ascii=False, indent=2)
@@ -0,0 +1,186 @@
+# === BÚSQUEDA EN LAS RESPUESTAS ABIERTAS ===
+# Índice invertido de las preguntas de texto libre (descripción de la cuota,
+# medidas para Fuerza Pública y Municipalidad, información adicional y datos
+# de contacto). Los textos se normalizan sin tildes ni mayúsculas
+# ("Iluminación" y "iluminacion" son el mismo término) y se quitan las
+# palabras vacías del español.
+#
+# Igual que la serie temporal, solo tokeniza las filas nuevas (si la última
+# fila procesada ya no coincide se vuelve a empezar) y en el dashboard hay un
+# índice por versión de los datos, derivado del anterior sin modificarlo.
+# Por columna se guarda:
+#   postings  término → posiciones de las filas que lo usan (un trozo por
+#             lote, ya ordenados): una búsqueda marca esas filas en una
+#             máscara y no recorre los textos
+#   pares     (fila, término) de cada uso, para contar los términos de
+#             cualquier subconjunto de filas con un solo bincount
+
+import copy
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from catalogo import PREGUNTAS_POR_ID, COLUMNA_FECHA, COLUMNA_ID_ENVIO
+from metricas import medir
+
+COLUMNAS_BUSQUEDA = [
+    PREGUNTAS_POR_ID[id_pregunta].columna
+    for id_pregunta in ["descripcion_cuota", "medidas_fp", "medidas_muni", "info_adicional", "deseo_participar"]
+]
+# Los datos de contacto se pueden buscar pero no entran en los términos frecuentes
+COLUMNAS_FRECUENTES = [columna for columna in COLUMNAS_BUSQUEDA if columna != PREGUNTAS_POR_ID["deseo_participar"].columna]
+CANTIDAD_TERMINOS = 15
+LARGO_MINIMO = 2
+PATRON_TERMINO = re.compile(r"[a-z0-9]+")
+# Ya normalizadas (sin tildes)
+PALABRAS_VACIAS = frozenset("""
+    a al algo algun alguna algunas alguno algunos ante antes aqui asi aun cada casi como con contra cual
+    cuando de del desde donde durante e el ella ellas ello ellos en entre era eran es esa esas ese eso
+    esos esta estan estar estas este esto estos etc fue fueron ha hace hacen han hasta hay la las le les
+    lo los mas me mi mis mucho muchos muy nada ni no nos nosotros o otra otras otro otros para pero poco
+    por porque que quien quienes se sea ser si sido sin sobre solo son su sus tambien tan tanto te tiene
+    tienen todo todos tu un una uno unos usted y ya yo
+""".split())
+
+
+def normalizar(texto):
+    # Minúsculas sin tildes ni diéresis ("Vigilancia Policíaca" → "vigilancia policiaca");
+    # la ñ queda como n
+    texto = str(texto).lower()
+    if texto.isascii():
+        return texto
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+
+
+def tokenizar(texto):
+    return [
+        termino for termino in PATRON_TERMINO.findall(normalizar(texto))
+        if len(termino) >= LARGO_MINIMO and termino not in PALABRAS_VACIAS
+    ]
+
+
+class IndiceTexto:
+    def __init__(self, columnas=COLUMNAS_BUSQUEDA):
+        self.columnas = columnas
+        self._bloqueo = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.filas = 0
+        # Vocabulario común a todas las columnas: id → término y término → id
+        self.terminos = []
+        self._ids = {}
+        self._postings = {columna: {} for columna in self.columnas}
+        self._pares = {columna: (np.empty(0, dtype="int64"), np.empty(0, dtype="int64")) for columna in self.columnas}
+        self._ultima = None
+
+    def _clave_fila(self, df, posicion):
+        fila = df.iloc[posicion]
+        return tuple(str(fila.get(columna, "")) for columna in (COLUMNA_FECHA, COLUMNA_ID_ENVIO))
+
+    def actualizar(self, df):
+        with self._bloqueo:
+            if self.filas and (len(df) < self.filas or self._clave_fila(df, self.filas - 1) != self._ultima):
+                self._reiniciar()
+            if len(df) == self.filas:
+                return
+            with medir("indice_texto"):
+                self._agregar(df.iloc[self.filas:])
+                self._ultima = self._clave_fila(df, self.filas - 1)
+
+    def derivar(self, df):
+        # Índice de otra versión de los datos, partiendo de este. Los arreglos
+        # y las listas de trozos se reemplazan al agregar filas, así que basta
+        # copiar los contenedores
+        with self._bloqueo:
+            nuevo = copy.copy(self)
+            nuevo._bloqueo = threading.Lock()
+            nuevo.terminos = list(self.terminos)
+            nuevo._ids = dict(self._ids)
+            nuevo._postings = {columna: dict(postings) for columna, postings in self._postings.items()}
+            nuevo._pares = dict(self._pares)
+        nuevo.actualizar(df)
+        return nuevo
+
+    def _agregar(self, nuevas):
+        for columna in self.columnas:
+            if columna not in nuevas.columns:
+                continue
+            filas, terminos = self._tokenizar(nuevas[columna])
+            filas += self.filas
+            anteriores_filas, anteriores_terminos = self._pares[columna]
+            self._pares[columna] = (np.concatenate([anteriores_filas, filas]), np.concatenate([anteriores_terminos, terminos]))
+
+            # Agrupado por término; el orden estable deja las filas ordenadas
+            orden = np.argsort(terminos, kind="stable")
+            terminos, filas = terminos[orden], filas[orden]
+            unicos, inicios = np.unique(terminos, return_index=True)
+            postings = self._postings[columna]
+            for termino, trozo in zip(unicos.tolist(), np.split(filas, inicios[1:])):
+                postings[termino] = postings.get(termino, []) + [trozo]
+        self.filas += len(nuevas)
+
+    def _tokenizar(self, serie):
+        # (fila, término) con cada término una vez por respuesta; cada texto
+        # distinto se tokeniza una sola vez
+        textos = serie.astype(object).where(serie.notna(), "").astype(str).to_numpy(dtype=object)
+        unicos, posiciones = np.unique(textos, return_inverse=True)
+        por_texto = [sorted({self._id(termino) for termino in tokenizar(texto)}) for texto in unicos]
+        largos = np.array([len(terminos) for terminos in por_texto], dtype="int64")
+        planos = np.array([termino for terminos in por_texto for termino in terminos], dtype="int64")
+        inicio_texto = np.cumsum(largos) - largos
+
+        # Los términos de cada fila son el tramo de su texto dentro de planos
+        por_fila = largos[posiciones]
+        inicio_fila = np.cumsum(por_fila) - por_fila
+        total = int(por_fila.sum())
+        tramo = np.arange(total) - np.repeat(inicio_fila, por_fila) + np.repeat(inicio_texto[posiciones], por_fila)
+        filas = np.repeat(np.arange(len(textos), dtype="int64"), por_fila)
+        return filas, planos[tramo] if total else np.empty(0, dtype="int64")
+
+    def _id(self, termino):
+        id_termino = self._ids.get(termino)
+        if id_termino is None:
+            id_termino = self._ids[termino] = len(self.terminos)
+            self.terminos.append(termino)
+        return id_termino
+
+    def _columnas(self, columnas):
+        return [columna for columna in (columnas or self.columnas) if columna in self._postings]
+
+    def mascara(self, consulta, columnas=None):
+        # Respuestas que usan todas las palabras de la consulta, en cualquiera
+        # de las columnas; None si la consulta no tiene términos
+        palabras = set(tokenizar(consulta or ""))
+        if not palabras:
+            return None
+        with self._bloqueo, medir("buscar_texto"):
+            mascara = np.ones(self.filas, dtype=bool)
+            for palabra in palabras:
+                id_termino = self._ids.get(palabra)
+                encontradas = np.zeros(self.filas, dtype=bool)
+                if id_termino is not None:
+                    for columna in self._columnas(columnas):
+                        for trozo in self._postings[columna].get(id_termino, []):
+                            encontradas[trozo] = True
+                mascara &= encontradas
+            return mascara
+
+    def frecuentes(self, mascara=None, columnas=None, cantidad=CANTIDAD_TERMINOS):
+        # Términos usados por más respuestas entre las filas elegidas. Los que
+        # tienen dígitos (teléfonos, correos) se buscan pero no se listan
+        with self._bloqueo:
+            conteos = np.zeros(len(self.terminos), dtype="int64")
+            for columna in self._columnas(columnas):
+                filas, terminos = self._pares[columna]
+                if mascara is not None:
+                    terminos = terminos[mascara[filas]]
+                conteos += np.bincount(terminos, minlength=len(self.terminos))
+            terminos = list(self.terminos)
+        conteos[[i for i, termino in enumerate(terminos) if not termino.isalpha()]] = 0
+        orden = np.argsort(-conteos, kind="stable")[:cantidad]
+        orden = orden[conteos[orden] > 0]
+        return pd.Series(conteos[orden], index=pd.Index([terminos[i] for i in orden], name="Término"), name="Menciones")
@@ -0,0 +1,94 @@
+# === CACHÉ EN DISCO COMPARTIDO ENTRE PROCESOS ===
+# st.cache_data vive dentro de un proceso: cada réplica del dashboard y cada
+# reinicio recalculan todo. Este caché guarda en disco los cálculos derivados
+# (un archivo por nombre) junto con la versión de los datos con la que se
+# hicieron; cualquier proceso que tenga los mismos datos los reutiliza.
+#
+#   CacheDisco().obtener("indicadores", version, lambda: calcular())
+#
+# La versión debe ser igual en todas las réplicas que leyeron los mismos
+# datos (SincronizadorRespuestas.instantanea(con_clave=True)). Un bloqueo de
+# archivo por nombre hace que, si varios procesos piden lo mismo a la vez,
+# uno calcule y los demás esperen y lean el resultado. Las escrituras son
+# atómicas (archivo temporal + rename), así leer no necesita el bloqueo.
+
+import os
+import pickle
+import sys
+import time
+from contextlib import contextmanager
+
+from metricas import contar, medir, observar
+
+if sys.platform == "win32":
+    import msvcrt
+    fcntl = None
+else:
+    import fcntl
+
+DIRECTORIO_CACHE = "cache_compartido"
+VARIABLE_CACHE = "ENCUESTA_CACHE_COMPARTIDO"
+_FALTA = object()
+
+
+@contextmanager
+def bloqueo_archivo(ruta):
+    # Bloqueo exclusivo entre procesos; se libera al cerrar el archivo
+    with open(ruta, "a+b") as archivo:
+        inicio = time.perf_counter()
+        if fcntl is not None:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+        else:
+            archivo.seek(0)
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_LOCK, 1)
+        observar("bloqueo_espera", time.perf_counter() - inicio, archivo=os.path.basename(ruta))
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+            else:
+                archivo.seek(0)
+                msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class CacheDisco:
+    def __init__(self, directorio=None):
+        self.directorio = directorio or os.environ.get(VARIABLE_CACHE, DIRECTORIO_CACHE)
+        os.makedirs(self.directorio, exist_ok=True)
+
+    def _ruta(self, nombre):
+        return os.path.join(self.directorio, f"{nombre}.pkl")
+
+    def _leer(self, nombre, version):
+        # La versión va primero en el archivo: si no coincide no se carga el valor
+        try:
+            with open(self._ruta(nombre), "rb") as archivo:
+                if pickle.load(archivo) != version:
+                    return _FALTA
+                return pickle.load(archivo)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return _FALTA
+
+    def _escribir(self, nombre, version, valor):
+        ruta = self._ruta(nombre)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as archivo:
+            pickle.dump(version, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(valor, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+
+    def obtener(self, nombre, version, calcular):
+        with medir("cache_disco", cache=nombre):
+            valor = self._leer(nombre, version)
+            if valor is _FALTA:
+                with bloqueo_archivo(self._ruta(nombre) + ".bloqueo"):
+                    # Otro proceso pudo haberlo calculado mientras se esperaba
+                    valor = self._leer(nombre, version)
+                    if valor is _FALTA:
+                        contar("cache_disco", cache=nombre, resultado="calculo")
+                        valor = calcular()
+                        self._escribir(nombre, version, valor)
+                        return valor
+            contar("cache_disco", cache=nombre, resultado="acierto")
+            return valor
@@ -0,0 +1,366 @@
+# === CATÁLOGO DE PREGUNTAS DE LA ENCUESTA ===
+# Fuente única de preguntas, opciones y posición de cada columna en la hoja.
+# app.py dibuja el formulario a partir de este catálogo y arma la fila con
+# fila_respuesta(); el dashboard decodifica con las mismas definiciones.
+#
+# "columna" es el nombre que usa el dashboard para cada posición. La hoja se
+# lee por posición (sincronizacion.py), así que el encabezado de la hoja
+# puede tener otro texto; solo ENCABEZADOS_HOJA, los que la hoja
+# "Respuestas" ya tenía, se verifican al leerla.
+#
+# Las respuestas cerradas se guardan como códigos compactos: el número de la
+# opción (base 1) para selección única y los números separados por "," para
+# selección múltiple. Las filas antiguas con el texto completo se siguen
+# decodificando sin cambios.
+#
+# El código es la posición de la opción, así que las opciones solo se
+# agregan al final: reordenar, insertar o quitar una cambiaría el significado
+# de todas las filas ya guardadas. codigos_opciones.json registra las
+# opciones publicadas (y sirve de leyenda para leer la hoja a mano); al
+# importar el catálogo se verifica que sigan en su lugar. Después de agregar
+# opciones se publica con: python catalogo.py
+
+import json
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Tipos de pregunta
+FECHA = "fecha"
+UNICA = "unica"
+MULTIPLE = "multiple"
+NUMERO = "numero"
+TEXTO = "texto"
+UBICACION = "ubicacion"
+
+SEPARADOR_MULTIPLE = ", "
+SEPARADOR_CODIGOS = ","
+PATRON_CODIGOS = r"\d+(?:,\d+)*"
+GUARDAR_CODIGOS = True
+RUTA_CODIGOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "codigos_opciones.json")
+
+
+@dataclass(frozen=True)
+class Pregunta:
+    id: str
+    columna: str
+    tipo: str
+    etiqueta: str = ""
+    opciones: list = field(default_factory=list)
+    control: str = ""
+
+    def codificar(self, valor):
+        if self.tipo == MULTIPLE:
+            if not valor:
+                return ""
+            if GUARDAR_CODIGOS:
+                return SEPARADOR_CODIGOS.join(str(self.opciones.index(opcion) + 1) for opcion in valor)
+            return SEPARADOR_MULTIPLE.join(valor)
+        if self.tipo == UNICA and GUARDAR_CODIGOS and valor in self.opciones:
+            return str(self.opciones.index(valor) + 1)
+        return valor
+
+
+BARRIOS_POR_DISTRITO = {
+    "Tamarindo": ["Tamarindo Centro", "Villareal"],
+    "Cabo Velas (Flamingo)": ["Flamingo", "Brasilito"],
+    "Tempate": ["Surf Side", "Potrero"],
+}
+
+PREGUNTAS = [
+    Pregunta("fecha", "Fecha y hora", FECHA),
+    Pregunta("distrito", "Distrito", UNICA, "Distrito:", list(BARRIOS_POR_DISTRITO), "selectbox"),
+    Pregunta("barrio", "Barrio", UNICA, "Barrio",
+             [barrio for barrios in BARRIOS_POR_DISTRITO.values() for barrio in barrios], "selectbox"),
+    Pregunta("edad", "Edad", NUMERO, "Edad:", control="number_input"),
+    Pregunta("sexo", "Sexo", UNICA, "Sexo:",
+             ["Hombre", "Mujer", "LGBTQ+", "Otro / Prefiero No decirlo"], "selectbox"),
+    Pregunta("escolaridad", "Escolaridad", UNICA, "Escolaridad:", [
+        "Ninguna", "Primaria", "Primaria incompleta", "Secundaria incompleta",
+        "Secundaria completa", "Universitaria incompleta", "Universitaria", "Técnico"
+    ], "selectbox"),
+    Pregunta("tipo_local", "Tipo de local", UNICA, "Tipo de local comercial:", [
+        "Supermercado", "Pulpería / Licorera", "Restaurante / Soda", "Bar",
+        "Tienda de artículos", "Gasolineras", "Servicios estéticos",
+        "Puesto de lotería", "Otro"
+    ], "selectbox"),
+    Pregunta("ubicacion", "Ubicación (enlace)", UBICACION),
+    Pregunta("percepcion_seguridad", "Percepción de seguridad", UNICA,
+             "¿Qué tan seguro(a) se siente en esta zona comercial?",
+             ["Muy seguro(a)", "Seguro(a)", "Ni seguro(a) Ni inseguro(a)", "Inseguro(a)", "Muy inseguro(a)"],
+             "radio"),
+    Pregunta("factores_inseguridad", "Factores de inseguridad (selección múltiple)", MULTIPLE,
+             "¿Por qué se siente inseguro(a)?", [
+                 "Presencia de personas desconocidas o comportamientos inusuales",
+                 "Poca iluminación en la zona",
+                 "Escasa presencia policial",
+                 "Robos frecuentes",
+                 "Consumo de sustancias en la vía pública",
+                 "Horarios considerados peligrosos (Entre las 6:00pm y las 5:00am)",
+                 "Disturbios o riñas cercanas",
+                 "Otro"
+             ], "multiselect"),
+    Pregunta("factores_sociales", "Factores sociales", MULTIPLE,
+             "¿Cuáles de los siguientes factores afectan la seguridad en su zona comercial?", [
+                 "Falta de oportunidades laborales",
+                 "Problemas vecinales",
+                 "Asentamientos ilegales",
+                 "Personas en situación de calle",
+                 "Zona de prostitución",
+                 "Consumo de alcohol en vía pública",
+                 "Personas con exceso de tiempo de ocio",
+                 "Cuarterías",
+                 "Lotes baldíos",
+                 "Ventas informales",
+                 "Pérdida de espacios públicos",
+                 "Otro"
+             ], "multiselect"),
+    Pregunta("falta_de_inversion", "Falta de inversión social", MULTIPLE, "Falta de Inversión Social", [
+        "Falta de oferta educativa",
+        "Falta de oferta deportiva",
+        "Falta de oferta recreativa",
+        "Falta de actividades culturales"
+    ], "multiselect"),
+    Pregunta("consumo_drogas", "Consumo de drogas", MULTIPLE, "Consumo de Drogas",
+             ["Área Privada", "Área Pública"], "multiselect"),
+    Pregunta("bunker", "Búnker", MULTIPLE, "Búnker(Sitio de oportunidad)",
+             ["Casa de habitación", "Edificación Abandonada", "Lote Baldío", "Otro"], "multiselect"),
+    Pregunta("delitos_zona", "Delitos en la zona", MULTIPLE,
+             "¿Seleccine los delitos que considere que ocurren alrededor de su comercio?", [
+                 "Disturbios en vía pública",
+                 "Daños a la propiedad",
+                 "Intimidación o amenazas con fines de lucro",
+                 "Hurto",
+                 "Receptación",
+                 "Contrabando",
+                 "Otro"
+             ], "multiselect"),
+    Pregunta("venta_drogas", "Venta de drogas", MULTIPLE, "¿Dónde ocurre la venta de drogas?",
+             ["Búnker (espacio cerrado)", "Vía pública", "Exprés", "Recinto privado"], "multiselect"),
+    Pregunta("delitos_vida", "Delitos contra la vida", MULTIPLE,
+             "Que delitos contra la vida considera que hay en la zona", ["Homicidios", "Heridos"], "multiselect"),
+    Pregunta("delitos_sexuales", "Delitos sexuales", MULTIPLE,
+             "¿Qué delitos sexuales ha percibido que existen en la zona?",
+             ["Abuso sexual", "Acoso sexual", "Violación"], "multiselect"),
+    Pregunta("asaltos", "Asaltos", MULTIPLE, "¿Qué tipos de asaltos hay en la zona?", [
+        "Asalto a personas",
+        "Asalto a comercio",
+        "Asalto a vivienda",
+        "Asalto a transporte público"
+    ], "multiselect"),
+    Pregunta("estafas", "Estafas", MULTIPLE, "¿Qué tipos de estafas ha observado que hay en la zona?", [
+        "Billetes falsos",
+        "Documentos falsos",
+        "Estafa (Oro)",
+        "Lotería falsos",
+        "Estafas informáticas",
+        "Estafa telefónica",
+        "Estafa con tarjetas"
+    ], "multiselect"),
+    Pregunta("robos", "Robos", MULTIPLE, "¿Qué tipos de robos ha identificado en la zona?", [
+        "Tacha a comercio",
+        "Tacha a edificaciones",
+        "Tacha a vivienda",
+        "Tacha de vehículos",
+        "Robo de vehículos"
+    ], "multiselect"),
+    Pregunta("observacion_control", "Observación de control", UNICA,
+             "¿Ha notado la presencia de personas o grupos que aparentan ejercer control sobre la actividad comercial?", [
+                 "Sí, he observado comportamientos similares",
+                 "He escuchado comentarios de otros comercios",
+                 "No",
+                 "Prefiero no responder"
+             ], "radio"),
+    Pregunta("descripcion_control", "Descripción de control", MULTIPLE,
+             "Describa qué tipo de comportamientos ha observado:", [
+                 "Cobros o 'cuotas' por dejar operar",
+                 "Personas que vigilan entradas/salidas",
+                 "Amenazas veladas o directas",
+                 "Restricciones sobre horarios o actividades",
+                 "Intermediarios de 'seguridad' no oficiales",
+                 "Personas ajenas con control territorial",
+                 "Interferencia constante en operación",
+                 "Presencia de grupos como 'autorizadores'",
+                 "Otros"
+             ], "multiselect"),
+    Pregunta("victima", "Victimización", UNICA,
+             "¿Usted o su local comercial han sido víctimas de algún delito en los últimos 12 meses?", [
+                 "Sí, y presenté la denuncia",
+                 "Sí, pero no presenté la denuncia",
+                 "No",
+                 "Prefiero no responder"
+             ], "radio"),
+    Pregunta("motivo_no_denuncia", "Motivo de no denuncia", MULTIPLE, "¿Por qué no presentó la denuncia?", [
+        "Distancia (falta de oficinas para recepción de denuncias)",
+        "Miedo a represalias",
+        "Falta de respuesta oportuna",
+        "He realizado denuncias y no ha pasado nada",
+        "Complejidad al colocar la denuncia",
+        "Desconocimiento de dónde colocar la denuncia",
+        "El Policía me dijo que era mejor no denunciar",
+        "Falta de tiempo para colocar la denuncia"
+    ], "multiselect"),
+    Pregunta("tipo_delito", "Tipo de delito", MULTIPLE, "¿Cuál fue el delito del que fue víctima?", [
+        "Hurto", "Asalto", "Cobro por protección", "Estafa",
+        "Daños a la propiedad", "Venta o consumo de drogas",
+        "Amenazas", "Cobros periódicos o 'cuotas'", "Otro"
+    ], "multiselect"),
+    Pregunta("horario_delito", "Horario del hecho", UNICA,
+             "¿Conoce el horario en el que ocurrió el hecho delictivo?", [
+                 "00:00 - 02:59 a.m.", "03:00 - 05:59 a.m.", "06:00 - 08:59 a.m.",
+                 "09:00 - 11:59 a.m.", "12:00 - 14:59 p.m.", "15:00 - 17:59 p.m.",
+                 "18:00 - 20:59 p.m.", "21:00 - 23:59 p.m.", "Desconocido"
+             ], "selectbox"),
+    Pregunta("modo_operar", "Modo de operar delictivo", MULTIPLE, "¿Cómo operaban los responsables?", [
+        "Arma blanca", "Arma de fuego", "Amenazas",
+        "Cobros o 'cuotas' por dejar operar", "Arrebato",
+        "Boquete", "Ganzúa", "Engaño", "No sé", "Otro"
+    ], "multiselect"),
+    Pregunta("exigencia_cuota", "Exigencia de cuota", UNICA,
+             "¿Ha recibido su local comercial algún tipo de exigencia económica o cuota obligatoria?",
+             ["Sí", "No", "Prefiero no responder"], "radio"),
+    Pregunta("descripcion_cuota", "Descripción de cuota", TEXTO,
+             "Detalle cómo ocurrió (frecuencia, forma de contacto, tipo de exigencia):", control="text_area"),
+    Pregunta("opinion_fp", "Opinión sobre Fuerza Pública", UNICA,
+             "¿Cómo califica el servicio policial de la Fuerza Pública cerca de su local?",
+             ["Excelente", "Bueno", "Regular", "Mala", "Muy mala"], "radio"),
+    Pregunta("cambio_servicio", "Cambio en el servicio", UNICA,
+             "¿Cómo ha cambiado el servicio en los últimos 12 meses?",
+             ["Ha mejorado mucho", "Ha mejorado", "Igual", "Ha empeorado", "Ha empeorado mucho"], "radio"),
+    Pregunta("conocimiento_policias", "Conocimiento de policías", UNICA,
+             "¿Conoce a los policías de Fuerza Pública o Policía Turística que patrullan su zona comercial?",
+             ["Sí", "No"], "radio"),
+    Pregunta("participacion_programa", "Participación en programa", UNICA,
+             "¿Conoce o participa en el Programa de Seguridad Comercial impulsado por Fuerza Pública?", [
+                 "No lo conozco",
+                 "Lo conozco, pero no participo",
+                 "Lo conozco y participo activamente",
+                 "No lo conozco, pero me gustaría participar",
+                 "Prefiero no responder"
+             ], "radio"),
+    Pregunta("deseo_participar", "Deseo de participar", TEXTO,
+             "Si desea ser contactado para formar parte del programa, indique nombre del comercio, "
+             "correo electrónico y número de teléfono:", control="text_area"),
+    Pregunta("medidas_fp", "Medidas Fuerza Pública", TEXTO,
+             "¿Qué medidas considera importantes que implemente la Fuerza Pública para mejorar la "
+             "seguridad en su zona comercial?", control="text_area"),
+    Pregunta("medidas_muni", "Medidas Municipalidad", TEXTO,
+             "¿Qué medidas considera necesarias por parte de la Municipalidad para mejorar la "
+             "seguridad en su zona comercial?", control="text_area"),
+    Pregunta("info_adicional", "Información adicional", TEXTO,
+             "¿Desea agregar alguna otra información que considere pertinente?", control="text_area"),
+    Pregunta("latitud", "Latitud", NUMERO),
+    Pregunta("longitud", "Longitud", NUMERO),
+    # Generado una vez por sesión del formulario; permite descartar envíos repetidos
+    Pregunta("id_envio", "ID de envío", TEXTO),
+]
+
+PREGUNTAS_POR_ID = {pregunta.id: pregunta for pregunta in PREGUNTAS}
+PREGUNTAS_POR_COLUMNA = {pregunta.columna: pregunta for pregunta in PREGUNTAS}
+
+# === COLUMNAS DE LA HOJA (derivadas del catálogo) ===
+COLUMNA_FECHA = PREGUNTAS_POR_ID["fecha"].columna
+COLUMNA_UBICACION = PREGUNTAS_POR_ID["ubicacion"].columna
+COLUMNA_LATITUD = PREGUNTAS_POR_ID["latitud"].columna
+COLUMNA_LONGITUD = PREGUNTAS_POR_ID["longitud"].columna
+COLUMNA_ID_ENVIO = PREGUNTAS_POR_ID["id_envio"].columna
+
+COLUMNAS = [pregunta.columna for pregunta in PREGUNTAS]
+COLUMNAS_CATEGORICAS = [p.columna for p in PREGUNTAS if p.tipo == UNICA]
+COLUMNAS_NUMERICAS = [p.columna for p in PREGUNTAS if p.tipo == NUMERO]
+COLUMNAS_TEXTO = [p.columna for p in PREGUNTAS if p.tipo == TEXTO]
+OPCIONES_MULTIPLES = {p.columna: p.opciones for p in PREGUNTAS if p.tipo == MULTIPLE}
+
+# Encabezados de la hoja "Respuestas" anteriores al catálogo (los que leía el
+# primer dashboard); deben estar en la misma posición que en el catálogo
+ENCABEZADOS_HOJA = [
+    "Distrito", "Ubicación (enlace)", "Percepción de seguridad", "Factores de inseguridad (selección múltiple)",
+    "Victimización", "Tipo de delito", "Horario del hecho", "Modo de operar delictivo",
+]
+
+
+def fila_respuesta(respuestas):
+    # respuestas: dict id → valor tal como lo devuelve el widget
+    return [pregunta.codificar(respuestas.get(pregunta.id, "")) for pregunta in PREGUNTAS]
+
+
+# === DECODIFICACIÓN (dashboard) ===
+def decodificar_unica(serie, pregunta):
+    # Acepta códigos ("3") y texto completo; devuelve una categoría ordenada
+    # según el catálogo que conserva al final los valores que no están en él
+    texto = serie.fillna("").astype(str)
+    numeros = pd.to_numeric(texto.where(texto.str.fullmatch(r"\d+")), errors="coerce")
+    validos = numeros.between(1, len(pregunta.opciones))
+    decodificada = texto.astype(object)
+    etiquetas = np.array(pregunta.opciones, dtype=object)
+    decodificada[validos] = etiquetas[numeros[validos].astype(int).to_numpy() - 1]
+    extras = [valor for valor in pd.unique(decodificada) if valor not in pregunta.opciones]
+    return pd.Series(
+        pd.Categorical(decodificada, categories=list(pregunta.opciones) + extras),
+        index=serie.index,
+    )
+
+
+def es_codigo_multiple(serie):
+    return serie.fillna("").astype(str).str.fullmatch(PATRON_CODIGOS)
+
+
+# === ENCABEZADOS DE LA HOJA ===
+class EncabezadosIncompatibles(ValueError):
+    pass
+
+
+def verificar_encabezados(encabezados):
+    # Un nombre del catálogo en otra posición, o uno de ENCABEZADOS_HOJA
+    # reemplazado por otro texto, indica que la hoja no sigue el orden del
+    # formulario: leerla por posición mezclaría las respuestas
+    errores = [
+        f"'{nombre}' está en la columna {posicion + 1} y el formulario la escribe en la {COLUMNAS.index(nombre) + 1}"
+        for posicion, nombre in enumerate(encabezados)
+        if nombre in PREGUNTAS_POR_COLUMNA and (posicion >= len(COLUMNAS) or COLUMNAS[posicion] != nombre)
+    ]
+    for nombre in ENCABEZADOS_HOJA:
+        posicion = COLUMNAS.index(nombre)
+        if nombre not in encabezados and posicion < len(encabezados) and encabezados[posicion] != "":
+            errores.append(f"la columna {posicion + 1} debería ser '{nombre}' y es '{encabezados[posicion]}'")
+    if errores:
+        raise EncabezadosIncompatibles("La hoja no sigue el orden del formulario: " + "; ".join(errores))
+
+
+# === CÓDIGOS PUBLICADOS ===
+def _codigos_actuales():
+    return {p.id: list(p.opciones) for p in PREGUNTAS if p.tipo in (UNICA, MULTIPLE)}
+
+
+def verificar_codigos(ruta=RUTA_CODIGOS):
+    # Cada lista publicada debe seguir siendo el comienzo de las opciones actuales
+    if not os.path.exists(ruta):
+        return
+    with open(ruta, encoding="utf-8") as archivo:
+        publicados = json.load(archivo)
+    actuales = _codigos_actuales()
+    for id_pregunta, opciones in publicados.items():
+        if actuales.get(id_pregunta, [])[:len(opciones)] != opciones:
+            raise ValueError(
+                f"Las opciones de '{id_pregunta}' ya no coinciden con {os.path.basename(ruta)}: "
+                "solo se pueden agregar opciones al final. Si solo se corrigió el texto de una "
+                "opción, actualice también el archivo."
+            )
+
+
+def publicar_codigos(ruta=RUTA_CODIGOS):
+    verificar_codigos(ruta)
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(_codigos_actuales(), archivo, ensure_ascii=False, indent=2)
+        archivo.write("\n")
+
+
+if GUARDAR_CODIGOS:
+    verificar_codigos()
+
+
+if __name__ == "__main__":
+    publicar_codigos()
+    print(f"Códigos publicados en {RUTA_CODIGOS}")
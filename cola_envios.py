@@ -0,0 +1,282 @@
+# === COLA LOCAL DE ENVÍOS (WRITE-BEHIND) ===
+# Cada respuesta se guarda primero en una base SQLite local (modo WAL) y se
+# confirma de inmediato al encuestado. Un hilo en segundo plano vacía la cola
+# hacia el almacenamiento (almacenamiento.py) por lotes. Cada escritura pasa
+# por el cubo de tokens del almacenamiento, si tiene: en una ráfaga las filas
+# se acumulan mientras no hay cupo y salen juntas en el siguiente lote. Los errores 429/5xx y de red
+# se reintentan con espera exponencial y jitter.
+#
+# Un 400/413 puede ser de una fila o de toda la hoja (límite de celdas,
+# pestaña renombrada). El lote se achica a la mitad hasta que una sola fila
+# falla; esa fila queda en sospecha y se prueba otra fila sola. Si la otra
+# se escribe, la sospechosa se prueba una vez más, y solo si vuelve a fallar
+# se aparta a la tabla "rechazados". Si la otra también falla el problema es
+# de la hoja: se espera y nada se aparta.
+# Las filas rechazadas se ven en el panel de diagnóstico del formulario y se
+# pueden devolver a la cola (reintentar_rechazados). Tras achicarse, el lote
+# vuelve a crecer de a poco (se duplica cada LOTES_PARA_CRECER lotes buenos).
+# La tabla "ids_envio" guarda los identificadores ya aceptados: un mismo envío
+# encolado dos veces (doble clic, reintento del usuario) se descarta.
+#
+# Varios procesos (réplicas del formulario) pueden compartir el archivo de la
+# cola. Cada lote se reclama dentro de una transacción BEGIN IMMEDIATE: sus
+# filas quedan marcadas con el dueño y el vencimiento de la reserva, y ningún
+# otro proceso las toma mientras no venza. Si el proceso muere a mitad de un
+# lote, la reserva vence y otro lo envía.
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from limitador import codigo_http, es_reintentable, espera_con_jitter
+from metricas import contar, medir, observar
+
+RUTA_COLA = "envios_pendientes.db"
+TAMANO_LOTE = 200
+INTERVALO_VACIADO = 2.0
+# Segundos que un proceso reserva un lote; debe cubrir de sobra un append_rows
+RESERVA_LOTE = 300.0
+LOTES_PARA_CRECER = 5
+
+
+def _abrir_base(ruta):
+    conexion = sqlite3.connect(ruta, timeout=30, isolation_level=None, check_same_thread=False)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=FULL")
+    conexion.execute(
+        "CREATE TABLE IF NOT EXISTS envios ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " creado REAL NOT NULL,"
+        " datos TEXT NOT NULL)"
+    )
+    # Columnas de la reserva; una cola creada antes no las tiene
+    columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(envios)")}
+    if "dueno" not in columnas:
+        conexion.execute("ALTER TABLE envios ADD COLUMN dueno TEXT")
+    if "vence" not in columnas:
+        conexion.execute("ALTER TABLE envios ADD COLUMN vence REAL")
+    conexion.execute(
+        "CREATE TABLE IF NOT EXISTS rechazados ("
+        " id INTEGER PRIMARY KEY,"
+        " creado REAL NOT NULL,"
+        " datos TEXT NOT NULL,"
+        " error TEXT NOT NULL)"
+    )
+    conexion.execute(
+        "CREATE TABLE IF NOT EXISTS ids_envio ("
+        " id_envio TEXT PRIMARY KEY,"
+        " creado REAL NOT NULL) WITHOUT ROWID"
+    )
+    return conexion
+
+
+class ColaEnvios:
+    def __init__(self, almacenamiento, ruta=RUTA_COLA, tamano_lote=TAMANO_LOTE,
+                 intervalo=INTERVALO_VACIADO, limitador=None):
+        # limitador: por defecto el del almacenamiento (None = sin límite)
+        self._almacenamiento = almacenamiento
+        self._limitador = limitador or almacenamiento.limitador
+        self._tamano_lote = tamano_lote
+        self._lote_actual = tamano_lote
+        self._lotes_buenos = 0
+        # Fila que falló sola: {"id", "error", "otra_escrita"}; otra_escrita
+        # indica que después se escribió otra fila (la hoja acepta filas)
+        self._sospechosa = None
+        self._intervalo = intervalo
+        self._dueno = uuid.uuid4().hex
+        self._fallidas = []
+        self._conexion = _abrir_base(ruta)
+        self._bloqueo = threading.Lock()
+        self._aviso = threading.Event()
+        self._hilo = threading.Thread(target=self._vaciar_continuamente, name="cola-envios", daemon=True)
+        self._hilo.start()
+
+    def encolar(self, datos, id_envio=None):
+        # La fila queda persistida en disco antes de devolver el control.
+        # Devuelve False si id_envio ya se había encolado antes.
+        ahora = time.time()
+        with self._bloqueo:
+            self._conexion.execute("BEGIN IMMEDIATE")
+            try:
+                if id_envio:
+                    nuevo = self._conexion.execute(
+                        "INSERT OR IGNORE INTO ids_envio (id_envio, creado) VALUES (?, ?)",
+                        (id_envio, ahora),
+                    ).rowcount
+                    if not nuevo:
+                        self._conexion.execute("ROLLBACK")
+                        contar("envio_repetido")
+                        return False
+                self._conexion.execute(
+                    "INSERT INTO envios (creado, datos) VALUES (?, ?)",
+                    (ahora, json.dumps(datos, ensure_ascii=False)),
+                )
+                self._conexion.execute("COMMIT")
+            except Exception:
+                self._conexion.execute("ROLLBACK")
+                raise
+        self._aviso.set()
+        return True
+
+    def pendientes(self):
+        with self._bloqueo:
+            return self._conexion.execute("SELECT COUNT(*) FROM envios").fetchone()[0]
+
+    def rechazados(self):
+        with self._bloqueo:
+            return self._conexion.execute("SELECT COUNT(*) FROM rechazados").fetchone()[0]
+
+    def reintentar_rechazados(self):
+        # Devuelve las filas rechazadas a la cola (p. ej. tras corregir la hoja)
+        with self._bloqueo:
+            self._conexion.execute("BEGIN IMMEDIATE")
+            try:
+                cantidad = self._conexion.execute(
+                    "INSERT INTO envios (id, creado, datos) SELECT id, creado, datos FROM rechazados"
+                ).rowcount
+                self._conexion.execute("DELETE FROM rechazados")
+                self._conexion.execute("COMMIT")
+            except Exception:
+                self._conexion.execute("ROLLBACK")
+                raise
+        contar("filas_reintentadas", cantidad)
+        self._aviso.set()
+        return cantidad
+
+    def _vaciar_lote(self):
+        # Se espera el cupo antes de leer la cola para que el lote incluya
+        # todas las filas que llegaron mientras tanto
+        if self._limitador is not None:
+            with medir("cola_espera_cupo"):
+                self._limitador.esperar()
+        filas = self._reclamar()
+        if not filas:
+            return 0
+
+        try:
+            with medir("cola_lote"):
+                self._almacenamiento.agregar_filas([json.loads(datos) for _, _, datos in filas])
+        except Exception:
+            self._fallidas = [id_fila for id_fila, _, _ in filas]
+            self._liberar(filas)
+            raise
+
+        # Solo se eliminan las filas confirmadas por la API
+        with self._bloqueo:
+            self._conexion.executemany(
+                "DELETE FROM envios WHERE id = ? AND dueno = ?", [(id_fila, self._dueno) for id_fila, _, _ in filas]
+            )
+        if self._sospechosa is not None:
+            if any(id_fila == self._sospechosa["id"] for id_fila, _, _ in filas):
+                self._sospechosa = None
+            else:
+                self._sospechosa["otra_escrita"] = True
+        self._lotes_buenos += 1
+        if self._lote_actual < self._tamano_lote and self._lotes_buenos >= LOTES_PARA_CRECER:
+            self._lote_actual = min(self._tamano_lote, self._lote_actual * 2)
+            self._lotes_buenos = 0
+        contar("filas_escritas", len(filas))
+        # Tiempo desde que el encuestado envió hasta que la fila quedó guardada
+        observar("cola_demora", time.time() - filas[0][1])
+        return len(filas)
+
+    def _reclamar(self):
+        # Filas libres o con la reserva vencida, en orden de llegada. La
+        # sospechosa se salta hasta que se escriba otra fila (si hay otra)
+        # y entonces se prueba sola
+        ahora = time.time()
+        sospechosa = self._sospechosa
+        with self._bloqueo:
+            self._conexion.execute("BEGIN IMMEDIATE")
+            try:
+                filas = []
+                if sospechosa is None or not sospechosa["otra_escrita"]:
+                    filas = self._conexion.execute(
+                        "SELECT id, creado, datos FROM envios WHERE (dueno IS NULL OR vence < ?) AND id IS NOT ?"
+                        " ORDER BY id LIMIT ?",
+                        (ahora, sospechosa and sospechosa["id"], self._lote_actual),
+                    ).fetchall()
+                if not filas and sospechosa is not None:
+                    filas = self._conexion.execute(
+                        "SELECT id, creado, datos FROM envios WHERE (dueno IS NULL OR vence < ?) AND id = ?",
+                        (ahora, sospechosa["id"]),
+                    ).fetchall()
+                self._conexion.executemany(
+                    "UPDATE envios SET dueno = ?, vence = ? WHERE id = ?",
+                    [(self._dueno, ahora + RESERVA_LOTE, id_fila) for id_fila, _, _ in filas],
+                )
+                self._conexion.execute("COMMIT")
+            except Exception:
+                self._conexion.execute("ROLLBACK")
+                raise
+        return filas
+
+    def _liberar(self, filas):
+        # El lote falló: las filas vuelven a estar disponibles para cualquier proceso
+        with self._bloqueo:
+            self._conexion.executemany(
+                "UPDATE envios SET dueno = NULL, vence = NULL WHERE id = ? AND dueno = ?",
+                [(id_fila, self._dueno) for id_fila, _, _ in filas],
+            )
+
+    def _apartar(self, id_fila, error):
+        with self._bloqueo:
+            self._conexion.execute(
+                "INSERT INTO rechazados (id, creado, datos, error) "
+                "SELECT id, creado, datos, ? FROM envios WHERE id = ?",
+                (error, id_fila),
+            )
+            self._conexion.execute("DELETE FROM envios WHERE id = ?", (id_fila,))
+        contar("fila_rechazada")
+
+    def _atender_error(self, error, intento):
+        codigo = codigo_http(error)
+        contar("error_escritura", codigo=codigo or "red")
+        self._lotes_buenos = 0
+        espera = espera_con_jitter(intento)
+        if codigo in (400, 413):
+            if len(self._fallidas) > 1:
+                # Se achica el lote hasta aislar la fila (o ver que fallan todas)
+                self._lote_actual = max(1, len(self._fallidas) // 2)
+                return
+            fallida = self._fallidas[0]
+            if self._sospechosa is None:
+                self._sospechosa = {"id": fallida, "error": str(error)[:500], "otra_escrita": False}
+                return
+            if self._sospechosa["id"] == fallida and self._sospechosa["otra_escrita"]:
+                # Falla sola aunque la hoja acepta otras filas: es la fila
+                self._apartar(fallida, str(error)[:500])
+                self._sospechosa = None
+                return
+            if self._sospechosa["id"] != fallida:
+                # Otra fila también falla sola: es la hoja, no la fila
+                self._sospechosa = None
+                contar("error_hoja", codigo=codigo)
+            # Sin otra fila que confirme, o con la hoja rechazando todo, se espera
+            time.sleep(espera)
+            return
+
+        if codigo == 429 and self._limitador is not None:
+            # La espera se aplica a todas las escrituras del proceso
+            self._limitador.penalizar(espera)
+            return
+        # Sin respuesta HTTP o con 401/403/404 se descarta la conexión; un 5xx
+        # es del servidor y la conexión sigue siendo válida
+        if codigo is None or not es_reintentable(error):
+            self._almacenamiento.reconectar()
+        time.sleep(espera)
+
+    def _vaciar_continuamente(self):
+        intento = 0
+        while True:
+            self._aviso.wait(timeout=self._intervalo)
+            self._aviso.clear()
+            try:
+                while self._vaciar_lote():
+                    intento = 0
+            except Exception as error:
+                self._atender_error(error, intento)
+                intento += 1
+                self._aviso.set()
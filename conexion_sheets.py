@@ -0,0 +1,88 @@
+# === CONEXIÓN COMPARTIDA A GOOGLE SHEETS ===
+# Un solo cliente autorizado y un solo libro abierto por proceso. La búsqueda
+# por nombre en Drive se hace una única vez; las reconexiones posteriores
+# (token vencido o fallo de la API) reabren el libro por su id.
+
+import threading
+
+import streamlit as st
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+
+from metricas import medir
+
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+NOMBRE_LIBRO = "Encuesta_Comercio_2025"
+
+_bloqueo = threading.RLock()
+_credenciales = None
+_cliente = None
+_libro = None
+_id_libro = None
+_hojas = {}
+
+
+def _token_vencido():
+    # oauth2client expone access_token_expired; google-auth expone expired
+    return bool(getattr(_credenciales, "access_token_expired", getattr(_credenciales, "expired", False)))
+
+
+def _renovar_token():
+    # oauth2client renueva con get_access_token(); google-auth lo hace la propia sesión
+    if hasattr(_credenciales, "get_access_token"):
+        _credenciales.get_access_token()
+
+
+def _conectar():
+    global _credenciales, _cliente, _libro, _id_libro
+    if _credenciales is None:
+        _credenciales = ServiceAccountCredentials.from_json_keyfile_dict(
+            st.secrets["gcp_service_account"], SCOPE
+        )
+    with medir("sheets_autorizar"):
+        _cliente = gspread.authorize(_credenciales)
+    if _id_libro is None:
+        with medir("sheets_abrir", por="nombre"):
+            _libro = _cliente.open(NOMBRE_LIBRO)
+        _id_libro = _libro.id
+    else:
+        with medir("sheets_abrir", por="id"):
+            _libro = _cliente.open_by_key(_id_libro)
+    _hojas.clear()
+
+
+def obtener_libro():
+    with _bloqueo:
+        if _libro is not None and _token_vencido():
+            _renovar_token()
+            _conectar()
+        elif _libro is None:
+            _conectar()
+        return _libro
+
+
+def obtener_hoja(nombre_hoja=None):
+    # nombre_hoja=None corresponde a la primera hoja (sheet1)
+    with _bloqueo:
+        libro = obtener_libro()
+        if nombre_hoja not in _hojas:
+            _hojas[nombre_hoja] = libro.sheet1 if nombre_hoja is None else libro.worksheet(nombre_hoja)
+        return _hojas[nombre_hoja]
+
+
+def invalidar_conexion():
+    # Conserva el id del libro para no repetir la búsqueda en Drive
+    global _cliente, _libro
+    with _bloqueo:
+        _cliente = None
+        _libro = None
+        _hojas.clear()
+
+
+def con_reconexion(operacion, nombre_hoja=None):
+    # Ejecuta operacion(hoja); si falla, reconecta y reintenta una vez
+    try:
+        return operacion(obtener_hoja(nombre_hoja))
+    except Exception:
+        invalidar_conexion()
+        return operacion(obtener_hoja(nombre_hoja))
@@ -1,198 +1,350 @@
+import json
+import os
+import threading
+import time
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import folium
-from streamlit_folium import st_folium
+from almacenamiento import crear_almacenamiento
+from sincronizacion import SincronizadorRespuestas, MAXIMO_SIN_SINCRONIZAR
+from espejo_local import EspejoRespuestas
+from cache_compartido import CacheDisco
+from indicadores import matriz_indicadores
+from filtros import IndiceFiltros, FILTROS_CATEGORICOS
+from serie_temporal import SerieTemporal, FRECUENCIAS
+from graficos import secciones_conteos, secciones_terminos, secciones_tiempo, semana_actual
+from busqueda import IndiceTexto, COLUMNAS_BUSQUEDA
+from materializar import VARIABLE_INSTANTANEAS, leer_actual, leer_secciones
+from rejilla import RejillaEspacial
+from mapas import coordenadas, construir_mapa, construir_mapa_zonas, MODO_ZONAS, MODO_PUNTOS, MODO_CALOR
+from metricas import METRICAS, contar, iniciar_exportacion, medir, observar
 
-# === CONFIGURACIÓN GOOGLE SHEETS ===
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+# Segundos que se reutilizan el sondeo de la hoja y actual.json antes de repetirlos
+INTERVALO_SONDEO = 5
+INTERVALO_PUNTERO = 10
+# Respuestas que se muestran al buscar, las más recientes primero
+LIMITE_RESULTADOS = 200
 
-creds = ServiceAccountCredentials.from_json_keyfile_dict(
-    st.secrets["gcp_service_account"], scope
-)
+inicio_recarga = time.perf_counter()
+iniciar_exportacion()
 
 # === CARGAR DATOS CON CACHE PARA EVITAR RECARGAS POR INTERACCIÓN ===
-@st.cache_data(ttl=300)
-def cargar_datos():
-    client = gspread.authorize(creds)
-    sheet = client.open("Encuesta_Comercio_2025").worksheet("Respuestas")
-    data = sheet.get_all_records()
-    df = pd.DataFrame(data)
-    return df
+# El sincronizador vive todo el proceso, arranca desde el espejo Parquet local
+# y solo descarga las filas nuevas. Varias réplicas pueden compartir el espejo
+# (ENCUESTA_ESPEJO) y el caché en disco de los cálculos derivados
+# (ENCUESTA_CACHE_COMPARTIDO): una sola lee la hoja y calcula, las demás
+# toman el resultado, también al arrancar
+@st.cache_resource
+def obtener_sincronizador():
+    return SincronizadorRespuestas(crear_almacenamiento("Respuestas"), espejo=EspejoRespuestas())
 
-# === INICIO DEL DASHBOARD ===
-st.set_page_config(page_title="Dashboard Comercio Guanacaste", layout="wide")
-st.title("📊 Dashboard Encuesta Comercio - Guanacaste")
+@st.cache_resource
+def obtener_cache_disco():
+    return CacheDisco()
 
-df = cargar_datos()
+# El sondeo (revisión de la hoja) tiene su propio caché, corto; los datos
+# se cachean por revisión y solo se vuelven a pedir cuando esta cambia
+@st.cache_data(ttl=INTERVALO_SONDEO)
+def sondear_datos():
+    contar("cache_calculo", cache="sondeo")
+    revision = obtener_sincronizador().sondear()
+    if revision is None:
+        # Sin sondeo la clave cambia cada MAXIMO_SIN_SINCRONIZAR segundos
+        return f"sin-sondeo-{int(time.time() // MAXIMO_SIN_SINCRONIZAR)}"
+    return revision
+
+# Con cache_resource todas las sesiones reciben el mismo DataFrame, sin
+# copiarlo en cada recarga: es de solo lectura (el sincronizador arma uno
+# nuevo en cada versión y nadie lo modifica)
+@st.cache_resource(ttl=MAXIMO_SIN_SINCRONIZAR, max_entries=2)
+def cargar_datos(revision):
+    contar("cache_calculo", cache="datos")
+    sincronizador = obtener_sincronizador()
+    sincronizador.actualizar(revision)
+    # La versión es la clave compartida entre réplicas, no el contador local
+    df, _, clave = sincronizador.instantanea(con_clave=True)
+    return df, clave
+
+# Los cálculos derivados se hacen una sola vez por versión de los datos;
+# el DataFrame no se usa como clave para no recorrerlo en cada recarga
+@st.cache_data
+def cargar_indicadores(_df, version):
+    contar("cache_calculo", cache="indicadores")
+    with medir("indicadores"):
+        return obtener_cache_disco().obtener("indicadores", version, lambda: matriz_indicadores(_df))
+
+# El índice de filtros guarda arreglos del tamaño de los datos: con
+# cache_resource se comparte sin copiarlo en cada recarga
+@st.cache_resource(max_entries=2)
+def cargar_indice(_df, version):
+    contar("cache_calculo", cache="indice")
+    indicadores = consultar("indicadores", cargar_indicadores, _df, version)
+    with medir("indice_filtros"):
+        return IndiceFiltros(_df, indicadores)
+
+# Celda geohash de cada respuesta y conteos por celda de cada capa del mapa
+@st.cache_resource(max_entries=2)
+def cargar_rejilla(_df, version):
+    contar("cache_calculo", cache="rejilla")
+    indicadores = consultar("indicadores", cargar_indicadores, _df, version)
+    with medir("rejilla"):
+        return obtener_cache_disco().obtener("rejilla", version, lambda: RejillaEspacial(_df, indicadores))
+
+# Estructuras incrementales (conteos por día, índice de texto): una por
+# versión de los datos. Cada versión nueva parte de la más reciente ya
+# construida y solo procesa sus filas nuevas; las anteriores no se modifican,
+# así que las sesiones que siguen en otra versión leen la suya y sus máscaras
+# tienen el mismo largo
+@st.cache_resource
+def obtener_ultimas():
+    return {}, threading.Lock()
+
+def derivar_ultima(nombre, df, crear):
+    ultimas, bloqueo = obtener_ultimas()
+    with bloqueo:
+        anterior = ultimas.get(nombre) or crear()
+    nueva = anterior.derivar(df)
+    with bloqueo:
+        # Una versión vieja que se vuelve a construir no reemplaza a la más reciente
+        if nueva.filas >= getattr(ultimas.get(nombre), "filas", 0):
+            ultimas[nombre] = nueva
+    return nueva
+
+@st.cache_resource(max_entries=2)
+def cargar_serie_temporal(_df, version):
+    contar("cache_calculo", cache="serie")
+    return derivar_ultima("serie", _df, SerieTemporal)
+
+# Índice invertido de las respuestas abiertas, también por versión
+@st.cache_resource(max_entries=2)
+def cargar_indice_texto(_df, version):
+    contar("cache_calculo", cache="texto")
+    return derivar_ultima("texto", _df, IndiceTexto)
+
+# El HTML del mapa se genera una vez por versión, combinación de filtros y modo
+@st.cache_data(max_entries=50)
+def cargar_mapa_html(_df, _rejilla, _mascara, version, filtros, modo):
+    contar("cache_calculo", cache="mapa")
+    with medir("mapa_html", modo=modo):
+        # Zonas y calor se dibujan desde las celdas agregadas
+        if modo in (MODO_ZONAS, MODO_CALOR):
+            calor = _rejilla.calor(_mascara)
+            if calor.empty:
+                return None
+            if modo == MODO_CALOR:
+                return construir_mapa(calor, MODO_CALOR).get_root().render()
+            return construir_mapa_zonas(_rejilla.zonas(_mascara), calor).get_root().render()
+        datos = _df if _mascara is None else _df[_mascara]
+        puntos = coordenadas(datos)
+        if puntos.empty:
+            return None
+        return construir_mapa(puntos, modo).get_root().render()
+
+# Aciertos de caché = consultas - cálculos (el cuerpo solo corre sin acierto)
+def consultar(cache, funcion, *argumentos):
+    contar("cache_consulta", cache=cache)
+    return funcion(*argumentos)
+
+# === SECCIONES DE GRÁFICOS (graficos.py) ===
+def mostrar_secciones(secciones):
+    for seccion in secciones:
+        if seccion.titulo:
+            st.subheader(seccion.titulo)
+        if seccion.figura is not None:
+            st.plotly_chart(seccion.figura, use_container_width=True)
+        elif seccion.aviso:
+            st.info(seccion.aviso)
+
+def mostrar_semana(columna, semana):
+    if semana:
+        ultimos, anteriores = semana
+        columna.metric("📅 Formularios en los últimos 7 días", ultimos, ultimos - anteriores)
+
+# === MODO INSTANTÁNEA ===
+# Con ENCUESTA_INSTANTANEAS el dashboard no lee la hoja: sirve lo que
+# materializar.py dejó en disco. Cada instantánea se lee una vez por proceso.
+@st.cache_data(ttl=INTERVALO_PUNTERO)
+def leer_manifiesto(directorio):
+    return leer_actual(directorio)
+
+@st.cache_data(max_entries=20)
+def leer_distrito(directorio, nombre, clave):
+    contar("cache_calculo", cache="instantanea")
+    with medir("instantanea_leer"):
+        ruta = os.path.join(directorio, nombre, clave)
+        with open(os.path.join(ruta, "resumen.json"), encoding="utf-8") as archivo:
+            resumen = json.load(archivo)
+        with open(os.path.join(ruta, "figuras.json"), encoding="utf-8") as archivo:
+            figuras = json.load(archivo)
+        ruta_mapa = os.path.join(ruta, "mapa.html")
+        html_mapa = None
+        if os.path.exists(ruta_mapa):
+            with open(ruta_mapa, encoding="utf-8") as archivo:
+                html_mapa = archivo.read()
+    secciones = {
+        "tiempo": {agrupacion: leer_secciones(datos) for agrupacion, datos in figuras["tiempo"].items()},
+        "conteos": leer_secciones(figuras["conteos"]),
+    }
+    return resumen, secciones, html_mapa
+
+def mostrar_instantanea(directorio):
+    manifiesto = leer_manifiesto(directorio)
+    if manifiesto is None:
+        st.warning("Aún no hay una instantánea publicada. Ejecute materializar.py.")
+        return None
 
-if df.empty:
-    st.warning("Aún no hay datos registrados.")
-else:
-    # === FILTRO POR DISTRITO ===
     st.sidebar.header("Filtros")
-    distritos = df["Distrito"].unique().tolist()
-    distrito_seleccionado = st.sidebar.selectbox("Seleccione un distrito:", ["Todos"] + distritos)
+    distritos = {distrito["nombre"]: distrito["clave"] for distrito in manifiesto["distritos"]}
+    distrito = st.sidebar.selectbox("Distrito:", list(distritos))
+    agrupacion = st.sidebar.radio("Agrupar en el tiempo por:", list(FRECUENCIAS))
+    st.sidebar.caption(f"Datos al {manifiesto['creada'].replace('T', ' ')}")
+    # La instantánea solo tiene el total y cada distrito ya calculados
+    st.sidebar.caption(
+        "Vista precalculada: los filtros de barrio, edad y fechas y los mapas "
+        "de puntos y de calor solo están disponibles en el modo en vivo."
+    )
+
+    resumen, secciones, html_mapa = consultar(
+        "instantanea", leer_distrito, directorio, manifiesto["nombre"], distritos[distrito]
+    )
+    columna_total, columna_semana = st.columns(2)
+    columna_total.metric("📋 Total de Formularios Recibidos", resumen["total"])
+    # Instantáneas anteriores solo tienen la semana del total
+    mostrar_semana(columna_semana, resumen.get("semana"))
 
-    if distrito_seleccionado != "Todos":
-        df = df[df["Distrito"] == distrito_seleccionado]
+    inicio_graficos = time.perf_counter()
+    mostrar_secciones(secciones["tiempo"][agrupacion])
+    mostrar_secciones(secciones["conteos"])
+    observar("graficos", time.perf_counter() - inicio_graficos)
+
+    st.subheader("Ubicaciones de Formularios Registrados")
+    if html_mapa:
+        with medir("mapa_componente"):
+            st.iframe(html_mapa, width=800, height=500)
+    else:
+        st.info("No hay ubicaciones registradas aún en los formularios.")
+    return manifiesto["nombre"]
+
+# === MODO EN VIVO ===
+def mostrar_en_vivo():
+    revision = consultar("sondeo", sondear_datos)
+    df, version = consultar("datos", cargar_datos, revision)
+    indice = consultar("indice", cargar_indice, df, version)
+    serie = consultar("serie", cargar_serie_temporal, df, version)
+    indice_texto = consultar("texto", cargar_indice_texto, df, version)
+
+    if df.empty:
+        st.warning("Aún no hay datos registrados.")
+        return version
+
+    # === FILTROS ===
+    # Un filtro vacío no restringe; los barrios se limitan a los distritos elegidos
+    st.sidebar.header("Filtros")
+    seleccion = {}
+    for columna in FILTROS_CATEGORICOS:
+        mascara_padre = indice.mascara({"Distrito": seleccion["Distrito"]}) if columna == "Barrio" and seleccion.get("Distrito") else None
+        seleccion[columna] = st.sidebar.multiselect(f"{columna}:", indice.valores(columna, mascara_padre), key=f"filtro_{columna}")
+
+    edad = None
+    if indice.edad is not None and indice.edad.minimo() is not None:
+        edad_minima, edad_maxima = int(indice.edad.minimo()), int(indice.edad.maximo())
+        if edad_minima < edad_maxima:
+            rango_edad = st.sidebar.slider("Edad:", edad_minima, edad_maxima, (edad_minima, edad_maxima))
+            edad = rango_edad if rango_edad != (edad_minima, edad_maxima) else None
+
+    fechas = None
+    if indice.fecha is not None and indice.fecha.minimo() is not None:
+        primera = pd.Timestamp(int(indice.fecha.minimo())).date()
+        ultima = pd.Timestamp(int(indice.fecha.maximo())).date()
+        rango_fechas = st.sidebar.date_input("Fechas:", (primera, ultima), min_value=primera, max_value=ultima)
+        # Mientras se elige el rango el widget devuelve una sola fecha
+        if len(rango_fechas) == 2 and tuple(rango_fechas) != (primera, ultima):
+            fechas = (pd.Timestamp(rango_fechas[0]), pd.Timestamp(rango_fechas[1]) + pd.Timedelta(days=1) - pd.Timedelta(1))
+
+    agrupacion = st.sidebar.radio("Agrupar en el tiempo por:", list(FRECUENCIAS))
+    modo_mapa = st.sidebar.radio("Tipo de mapa:", [MODO_ZONAS, MODO_PUNTOS, MODO_CALOR])
+
+    with medir("filtrar"):
+        mascara = indice.mascara(seleccion, edad, fechas)
+        # Las series de tiempo aplican el rango de fechas como recorte del eje
+        mascara_sin_fechas = indice.mascara(seleccion, edad) if fechas else mascara
+    clave_filtros = repr((sorted((c, tuple(v)) for c, v in seleccion.items() if v), edad, fechas))
 
     # === MÉTRICAS ===
-    st.metric("📋 Total de Formularios Recibidos", len(df))
-
-    # === PERCEPCIÓN DE SEGURIDAD ===
-    if "Percepción de seguridad" in df.columns:
-        st.subheader("Percepción de Seguridad")
-        fig1 = px.pie(
-            df,
-            names="Percepción de seguridad",
-            title="Percepción de Seguridad",
-            hole=0.4
-        )
-        st.plotly_chart(fig1, use_container_width=True)
-
-    # === FACTORES DE INSEGURIDAD ===
-    if "Factores de inseguridad (selección múltiple)" in df.columns:
-        st.subheader("Factores de Inseguridad Reportados")
-        factores = df["Factores de inseguridad (selección múltiple)"].dropna().str.split(", ")
-        factores_flat = [item for sublist in factores for item in sublist if item != ""]
-        factores_df = pd.DataFrame(factores_flat, columns=["Factor"])
-
-        if not factores_df.empty:
-            fig2 = px.histogram(
-                factores_df,
-                x="Factor",
-                title="Factores de Inseguridad",
-                color_discrete_sequence=["indianred"]
-            )
-            fig2.update_layout(
-                yaxis=dict(tickmode='linear', dtick=1)
-            )
-            st.plotly_chart(fig2, use_container_width=True)
-        else:
-            st.info("No hay datos suficientes de factores de inseguridad.")
-
-    # === TIPOS DE DELITOS REPORTADOS ===
-    if "Tipo de delito" in df.columns:
-        st.subheader("Tipos de Delitos Reportados")
-        delitos = df["Tipo de delito"].dropna().str.split(", ")
-        delitos_flat = [item for sublist in delitos for item in sublist if item != ""]
-        delitos_df = pd.DataFrame(delitos_flat, columns=["Delito"])
-
-        if not delitos_df.empty:
-            fig3 = px.histogram(
-                delitos_df,
-                x="Delito",
-                title="Frecuencia de Tipos de Delito",
-                color_discrete_sequence=["darkblue"]
-            )
-            fig3.update_layout(
-                yaxis=dict(tickmode='linear', dtick=1)
-            )
-            st.plotly_chart(fig3, use_container_width=True)
-        else:
-            st.info("No hay datos suficientes de delitos reportados.")
-
-    # === VICTIMIZACIÓN ===
-    if "Victimización" in df.columns:
-        st.subheader("Victimización Comercial")
-        fig4 = px.pie(
-            df,
-            names="Victimización",
-            title="¿Han sido víctimas de delitos?",
-            hole=0.5
-        )
-        st.plotly_chart(fig4, use_container_width=True)
-
-    # === MODO DE OPERAR DELICTIVO ===
-    if "Modo de operar delictivo" in df.columns:
-        st.subheader("Modos de Operar Delictivo Observados")
-        modos = df["Modo de operar delictivo"].dropna().str.split(", ")
-        modos_flat = [item for sublist in modos for item in sublist if item != ""]
-        modos_df = pd.DataFrame(modos_flat, columns=["Modo"])
-
-        if not modos_df.empty:
-            fig5 = px.bar(
-                modos_df.value_counts().reset_index(),
-                x="Modo",
-                y="count",
-                labels={"count": "Cantidad"},
-                title="Modos de Operar Delictivo"
-            )
-            fig5.update_layout(
-                yaxis=dict(tickmode='linear', dtick=1)
-            )
-            st.plotly_chart(fig5, use_container_width=True)
-        else:
-            st.info("No hay datos suficientes sobre modos de operar.")
-
-    # === HORARIOS DE DELITOS ===
-    if "Horario del hecho" in df.columns:
-        st.subheader("Horarios en los que ocurren más delitos")
-        horario_df = df["Horario del hecho"].dropna()
-
-        if not horario_df.empty:
-            horario_df = horario_df.value_counts().reset_index()
-            horario_df.columns = ["Horario", "Cantidad"]
-            orden_horarios = [
-                "00:00 - 02:59 a.m.", "03:00 - 05:59 a.m.", "06:00 - 08:59 a.m.",
-                "09:00 - 11:59 a.m.", "12:00 - 14:59 p.m.", "15:00 - 17:59 p.m.",
-                "18:00 - 20:59 p.m.", "21:00 - 23:59 p.m.", "Desconocido"
-            ]
-            horario_df["Horario"] = pd.Categorical(horario_df["Horario"], categories=orden_horarios, ordered=True)
-            horario_df = horario_df.sort_values("Horario")
-            fig6 = px.line(
-                horario_df,
-                x="Horario",
-                y="Cantidad",
-                markers=True,
-                title="Frecuencia de delitos por horario",
-                labels={"Cantidad": "Cantidad de delitos", "Horario": "Rango horario"}
-            )
-            fig6.update_layout(
-                yaxis=dict(tickmode='linear', dtick=1)
-            )
-            st.plotly_chart(fig6, use_container_width=True)
-        else:
-            st.info("No hay datos suficientes sobre horarios de delitos.")
-
-    # === MAPA DE UBICACIONES CON COLORES POR DISTRITO ===
+    columna_total, columna_semana = st.columns(2)
+    columna_total.metric("📋 Total de Formularios Recibidos", indice.total(mascara))
+    mostrar_semana(columna_semana, semana_actual(serie, mascara_sin_fechas))
+
+    # === GRÁFICOS ===
+    inicio_graficos = time.perf_counter()
+    desde, hasta = fechas if fechas else (None, None)
+    mostrar_secciones(secciones_tiempo(serie, agrupacion, desde, hasta, mascara_sin_fechas))
+    mostrar_secciones(secciones_conteos(indice, mascara))
+    observar("graficos", time.perf_counter() - inicio_graficos)
+
+    # === MAPA DE UBICACIONES: ZONAS, PUNTOS POR DISTRITO O CALOR ===
     st.subheader("Ubicaciones de Formularios Registrados")
 
-    def extraer_lat_lon(url):
-        try:
-            if pd.notna(url) and "maps?q=" in url:
-                coords = url.split("maps?q=")[-1].split(",")
-                lat = float(coords[0])
-                lon = float(coords[1])
-                return lat, lon
-        except:
-            return None, None
-
-    if "Ubicación (enlace)" in df.columns and not df["Ubicación (enlace)"].dropna().empty:
-        ubicaciones = df["Ubicación (enlace)"].apply(lambda x: extraer_lat_lon(x))
-        distritos_mapa = df["Distrito"]
-
-        m = folium.Map(location=[10.3, -85.8], zoom_start=11)
-
-        colores_distrito = {
-            "Tamarindo": "blue",
-            "Cartagena": "green",
-            "Cabo Velas": "red"
-        }
-
-        for (ubicacion, distrito) in zip(ubicaciones, distritos_mapa):
-            if ubicacion and ubicacion[0] is not None:
-                color_pin = colores_distrito.get(distrito, "gray")
-                folium.Marker(
-                    location=[ubicacion[0], ubicacion[1]],
-                    tooltip=distrito,
-                    icon=folium.Icon(color=color_pin)
-                ).add_to(m)
-
-        st_folium(m, width=800, height=500)
+    rejilla = consultar("rejilla", cargar_rejilla, df, version)
+    html_mapa = consultar("mapa", cargar_mapa_html, df, rejilla, mascara, version, clave_filtros, modo_mapa)
+    if html_mapa:
+        with medir("mapa_componente"):
+            st.iframe(html_mapa, width=800, height=500)
     else:
         st.info("No hay ubicaciones registradas aún en los formularios.")
 
+    # === RESPUESTAS ABIERTAS ===
+    # La búsqueda se combina con los filtros; los términos frecuentes se
+    # calculan sobre las respuestas encontradas
+    st.subheader("Búsqueda en Respuestas Abiertas")
+    consulta = st.text_input("Palabras clave (no distingue tildes ni mayúsculas):")
+    mascara_texto = indice_texto.mascara(consulta)
+    if mascara_texto is not None and mascara is not None:
+        mascara_texto = mascara_texto & mascara
+    mostrar_secciones(secciones_terminos(indice_texto, indice, mascara if mascara_texto is None else mascara_texto))
+    if mascara_texto is not None:
+        encontradas = df[mascara_texto]
+        st.caption(f"{len(encontradas)} respuestas contienen «{consulta}»")
+        if not encontradas.empty:
+            columnas = [c for c in ["Fecha y hora", "Distrito", "Barrio"] + COLUMNAS_BUSQUEDA if c in df.columns]
+            st.dataframe(encontradas[columnas].iloc[::-1].head(LIMITE_RESULTADOS), use_container_width=True, hide_index=True)
+    return version
+
+# === INICIO DEL DASHBOARD ===
+st.set_page_config(page_title="Dashboard Comercio Guanacaste", layout="wide")
+st.title("📊 Dashboard Encuesta Comercio - Guanacaste")
+
+DIRECTORIO_INSTANTANEAS = os.environ.get(VARIABLE_INSTANTANEAS)
+if DIRECTORIO_INSTANTANEAS:
+    version = mostrar_instantanea(DIRECTORIO_INSTANTANEAS)
+else:
+    version = mostrar_en_vivo()
+
+observar("dashboard_recarga", time.perf_counter() - inicio_recarga)
+
+# === PANEL DE DIAGNÓSTICO (OCULTO) ===
+# Solo aparece con ?diagnostico=1 en la URL. Muestra las métricas de este
+# proceso; las del formulario se exportan en su propio proceso.
+if st.query_params.get("diagnostico") == "1":
+    with st.expander("🔧 Diagnóstico", expanded=True):
+        st.caption(f"Proceso activo hace {time.time() - METRICAS.inicio:.0f} s · datos versión {version}")
+        st.markdown("**Latencias recientes**")
+        st.dataframe(pd.DataFrame(METRICAS.resumen()), hide_index=True)
+
+        st.markdown("**Aciertos de caché**")
+        aciertos = []
+        for cache in ["sondeo", "datos", "indice", "indicadores", "rejilla", "serie", "texto", "mapa", "instantanea"]:
+            consultas = METRICAS.valor("cache_consulta", cache=cache)
+            calculos = METRICAS.valor("cache_calculo", cache=cache)
+            aciertos.append({
+                "caché": cache,
+                "consultas": int(consultas),
+                "cálculos": int(calculos),
+                "aciertos %": round(100 * (consultas - calculos) / consultas, 1) if consultas else None,
+            })
+        st.dataframe(pd.DataFrame(aciertos), hide_index=True)
+
+        st.markdown("**Contadores**")
+        st.json(METRICAS.contadores())
+        if st.checkbox("Ver formato Prometheus"):
+            st.code(METRICAS.texto_prometheus(), language="text")
+
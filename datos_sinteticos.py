@@ -0,0 +1,123 @@
+# === RESPUESTAS SINTÉTICAS ===
+# Respuestas aleatorias pero válidas, tomadas de las opciones del catálogo,
+# para pruebas de carga y benchmarks sin datos reales. Con la misma semilla
+# se obtienen siempre las mismas respuestas.
+#
+#   respuestas_aleatorias()  una respuesta con el formato de los widgets
+#   generar_filas(n)         n filas tal como las devuelve la hoja (texto y
+#                            códigos), generadas de forma vectorizada para
+#                            llegar al millón de filas en segundos
+
+import random
+
+import numpy as np
+import pandas as pd
+
+from catalogo import (
+    PREGUNTAS, PREGUNTAS_POR_ID, BARRIOS_POR_DISTRITO, COLUMNAS, UNICA, MULTIPLE, TEXTO, SEPARADOR_CODIGOS,
+)
+
+# Centro aproximado de cada distrito y dispersión en grados (~3 km)
+CENTROS_DISTRITO = {
+    "Tamarindo": (10.299, -85.838),
+    "Cabo Velas (Flamingo)": (10.432, -85.785),
+    "Tempate": (10.385, -85.720),
+}
+DISPERSION = 0.03
+MAXIMO_MULTIPLE = 3
+TEXTOS = [
+    "", "", "",
+    "Más patrullaje en la noche",
+    "Mejor iluminación en la calle principal",
+    "Cámaras de vigilancia y más presencia policial",
+    "Coordinar con la asociación de comerciantes",
+    "Limpieza de lotes baldíos",
+]
+FECHA_INICIO = "2025-01-01"
+DIAS = 365
+
+
+def respuestas_aleatorias(azar=None):
+    # Devuelve {id: valor} con el mismo formato que los widgets del formulario,
+    # más "ubicacion" como [lat, lon] dentro del distrito elegido
+    azar = azar or random.Random()
+    respuestas = {}
+    for pregunta in PREGUNTAS:
+        if not pregunta.control:
+            continue
+        if pregunta.tipo == UNICA:
+            respuestas[pregunta.id] = azar.choice(pregunta.opciones)
+        elif pregunta.tipo == MULTIPLE:
+            cantidad = azar.randint(1, min(MAXIMO_MULTIPLE, len(pregunta.opciones)))
+            respuestas[pregunta.id] = azar.sample(pregunta.opciones, cantidad)
+        elif pregunta.tipo == TEXTO:
+            respuestas[pregunta.id] = azar.choice(TEXTOS)
+        else:
+            respuestas[pregunta.id] = azar.randint(18, 75)
+
+    distrito = respuestas["distrito"]
+    respuestas["barrio"] = azar.choice(BARRIOS_POR_DISTRITO[distrito])
+    latitud, longitud = CENTROS_DISTRITO[distrito]
+    respuestas["ubicacion"] = [
+        round(latitud + azar.uniform(-DISPERSION, DISPERSION), 6),
+        round(longitud + azar.uniform(-DISPERSION, DISPERSION), 6),
+    ]
+    return respuestas
+
+
+def _codigos_multiples(azar, n, cantidad_opciones):
+    # Cada opción se marca con probabilidad ~1.5/cantidad; algunas filas quedan vacías
+    # El texto se arma una sola vez por combinación distinta, no por fila
+    marcadas = azar.random((n, cantidad_opciones)) < min(1.5 / cantidad_opciones, 0.5)
+    mascaras = marcadas @ (1 << np.arange(cantidad_opciones, dtype=np.int64))
+    unicas, posiciones = np.unique(mascaras, return_inverse=True)
+    textos = np.array([
+        SEPARADOR_CODIGOS.join(str(bit + 1) for bit in range(cantidad_opciones) if mascara >> bit & 1)
+        for mascara in unicas
+    ], dtype=object)
+    return textos[posiciones]
+
+
+def _numeros_texto(valores, maximo):
+    # astype(str) es lento en arreglos grandes; se indexa una tabla ya convertida
+    return np.array([str(numero) for numero in range(maximo + 1)], dtype=object)[valores]
+
+
+def generar_filas(n, semilla=1):
+    # DataFrame con las columnas de la hoja, todas como texto
+    azar = np.random.default_rng(semilla)
+    distritos = list(BARRIOS_POR_DISTRITO)
+    indice_distrito = azar.integers(0, len(distritos), n)
+    columnas = {}
+
+    for pregunta in PREGUNTAS:
+        if pregunta.tipo == UNICA:
+            columnas[pregunta.columna] = _numeros_texto(azar.integers(1, len(pregunta.opciones) + 1, n), len(pregunta.opciones))
+        elif pregunta.tipo == MULTIPLE:
+            columnas[pregunta.columna] = _codigos_multiples(azar, n, len(pregunta.opciones))
+        elif pregunta.tipo == TEXTO:
+            columnas[pregunta.columna] = np.array(TEXTOS, dtype=object)[azar.integers(0, len(TEXTOS), n)]
+
+    columnas[PREGUNTAS_POR_ID["distrito"].columna] = _numeros_texto(indice_distrito + 1, len(distritos))
+    barrios = PREGUNTAS_POR_ID["barrio"].opciones
+    primer_barrio = np.array([barrios.index(BARRIOS_POR_DISTRITO[d][0]) for d in distritos])
+    cantidad_barrios = np.array([len(BARRIOS_POR_DISTRITO[d]) for d in distritos])
+    barrio = primer_barrio[indice_distrito] + (azar.random(n) * cantidad_barrios[indice_distrito]).astype(int)
+    columnas[PREGUNTAS_POR_ID["barrio"].columna] = _numeros_texto(barrio + 1, len(barrios))
+    columnas[PREGUNTAS_POR_ID["edad"].columna] = _numeros_texto(azar.integers(18, 76, n), 75)
+
+    segundos = np.sort(azar.integers(0, DIAS * 86400, n))
+    fechas = pd.Timestamp(FECHA_INICIO) + pd.to_timedelta(segundos, unit="s")
+    columnas[PREGUNTAS_POR_ID["fecha"].columna] = np.datetime_as_string(fechas.to_numpy(), unit="s")
+
+    centros = np.array([CENTROS_DISTRITO[d] for d in distritos])
+    latitud = np.round(centros[indice_distrito, 0] + azar.uniform(-DISPERSION, DISPERSION, n), 6).astype(str)
+    longitud = np.round(centros[indice_distrito, 1] + azar.uniform(-DISPERSION, DISPERSION, n), 6).astype(str)
+    columnas[PREGUNTAS_POR_ID["latitud"].columna] = latitud
+    columnas[PREGUNTAS_POR_ID["longitud"].columna] = longitud
+    columnas[PREGUNTAS_POR_ID["ubicacion"].columna] = (
+        "https://www.google.com/maps?q=" + pd.Series(latitud) + "," + pd.Series(longitud)
+    ).to_numpy(dtype=object)
+    columnas[PREGUNTAS_POR_ID["id_envio"].columna] = np.char.add(f"sintetico-{semilla}-", np.arange(n).astype(str))
+
+    return pd.DataFrame({columna: np.asarray(columnas[columna], dtype=object) for columna in COLUMNAS})
@@ -0,0 +1,141 @@
+# === ESPEJO LOCAL EN PARQUET DE LAS RESPUESTAS ===
+# Cada sincronización escribe un lote Parquet con tipos definidos: categorías
+# para las preguntas de selección única, fecha real para la marca de tiempo y
+# números para edad, latitud y longitud. El dashboard arranca desde estos
+# archivos sin tocar la red.
+#
+# Varios procesos (réplicas del dashboard, materializar.py) pueden compartir
+# el mismo directorio (ENCUESTA_ESPEJO): quien escribe lo hace dentro de
+# bloqueo(), y "generacion" cambia en cada recarga completa para que los
+# demás sepan que sus lotes ya no sirven.
+
+import glob
+import json
+import os
+import time
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from cache_compartido import bloqueo_archivo
+from catalogo import (
+    COLUMNA_FECHA, COLUMNA_UBICACION, COLUMNA_LATITUD, COLUMNA_LONGITUD,
+    COLUMNAS_CATEGORICAS, COLUMNAS_NUMERICAS, PREGUNTAS_POR_COLUMNA, decodificar_unica,
+)
+from metricas import medir
+
+DIRECTORIO_ESPEJO = "espejo_respuestas"
+VARIABLE_ESPEJO = "ENCUESTA_ESPEJO"
+PATRON_COORDENADAS = r"maps\?q=(-?\d+(?:\.\d+)?),\s*(-?\d+(?:\.\d+)?)"
+
+
+def tipar_respuestas(df):
+    df = df.copy()
+    if COLUMNA_UBICACION in df.columns:
+        coordenadas = df[COLUMNA_UBICACION].astype(str).str.extract(PATRON_COORDENADAS)
+        for posicion, columna in enumerate([COLUMNA_LATITUD, COLUMNA_LONGITUD]):
+            extraidas = pd.to_numeric(coordenadas[posicion], errors="coerce")
+            if columna in df.columns:
+                df[columna] = pd.to_numeric(df[columna], errors="coerce").fillna(extraidas)
+            else:
+                df[columna] = extraidas
+
+    for columna in df.columns:
+        if columna == COLUMNA_FECHA:
+            df[columna] = pd.to_datetime(df[columna], errors="coerce", format="ISO8601")
+        elif columna in COLUMNAS_NUMERICAS:
+            df[columna] = pd.to_numeric(df[columna], errors="coerce")
+        elif columna in COLUMNAS_CATEGORICAS:
+            # Códigos compactos o texto completo → categoría con las opciones del catálogo
+            df[columna] = decodificar_unica(df[columna], PREGUNTAS_POR_COLUMNA[columna])
+        else:
+            df[columna] = df[columna].astype(str)
+    return df
+
+
+def unir_respuestas(anterior, nuevo):
+    # Agrega filas ya tipadas sin volver a tipar todo: concat deja como texto
+    # las categorías que difieren entre las partes, así que solo esas
+    # columnas se unen (primero las categorías de la parte anterior)
+    if anterior.empty:
+        return nuevo
+    if nuevo.empty:
+        return anterior
+    df = pd.concat([anterior, nuevo], ignore_index=True)
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna not in anterior.columns or columna not in nuevo.columns:
+            continue
+        partes = [anterior[columna], nuevo[columna]]
+        if isinstance(df[columna].dtype, pd.CategoricalDtype) or not all(
+            isinstance(parte.dtype, pd.CategoricalDtype) for parte in partes
+        ):
+            continue
+        df[columna] = pd.Series(union_categoricals(partes), index=df.index)
+    return df
+
+
+class EspejoRespuestas:
+    def __init__(self, directorio=None):
+        directorio = directorio or os.environ.get(VARIABLE_ESPEJO, DIRECTORIO_ESPEJO)
+        self.directorio = directorio
+        self._ruta_estado = os.path.join(directorio, "estado.json")
+        os.makedirs(directorio, exist_ok=True)
+
+    def bloqueo(self):
+        return bloqueo_archivo(os.path.join(self.directorio, ".bloqueo"))
+
+    def estado(self):
+        # encabezados, filas, última fila de la hoja y lotes que la respaldan
+        if not os.path.exists(self._ruta_estado):
+            return None
+        with open(self._ruta_estado, encoding="utf-8") as archivo:
+            return json.load(archivo)
+
+    def _guardar_estado(self, estado):
+        temporal = self._ruta_estado + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(estado, archivo, ensure_ascii=False)
+        os.replace(temporal, self._ruta_estado)
+
+    def leer(self, desde=0, estado=None):
+        # Solo cuentan los lotes registrados en el estado; un lote huérfano
+        # (caída antes de guardar el estado) se ignora y se vuelve a descargar.
+        # desde: cantidad de lotes que quien lee ya tiene
+        estado = estado or self.estado()
+        if not estado or not estado.get("lotes", [])[desde:]:
+            return pd.DataFrame()
+        df = pd.concat(
+            [pd.read_parquet(os.path.join(self.directorio, lote)) for lote in estado["lotes"][desde:]],
+            ignore_index=True,
+        )
+        # Los lotes pueden tener categorías distintas; se unifican al leer
+        return tipar_respuestas(df)
+
+    def agregar_lote(self, df, estado):
+        with medir("espejo_escribir"):
+            self._agregar_lote(df, estado)
+
+    def _agregar_lote(self, df, estado):
+        anterior = self.estado() or {}
+        lotes = list(anterior.get("lotes", []))
+        if df.empty:
+            # Solo filas repetidas: avanza la posición en la hoja sin crear un lote
+            self._guardar_estado(dict(estado, lotes=lotes, generacion=anterior.get("generacion")))
+            return
+        numero = int(lotes[-1][5:11]) + 1 if lotes else 1
+        lote = f"lote_{numero:06d}.parquet"
+        ruta = os.path.join(self.directorio, lote)
+        df.to_parquet(ruta + ".tmp", index=False)
+        os.replace(ruta + ".tmp", ruta)
+        self._guardar_estado(dict(estado, lotes=lotes + [lote], generacion=anterior.get("generacion")))
+
+    def reemplazar(self, df, estado):
+        # Primero se invalida el estado para que una caída a medias fuerce una recarga completa
+        if os.path.exists(self._ruta_estado):
+            os.remove(self._ruta_estado)
+        for ruta in glob.glob(os.path.join(self.directorio, "lote_*.parquet")):
+            os.remove(ruta)
+        estado = dict(estado, lotes=[], generacion=str(time.time_ns()))
+        self._guardar_estado(estado)
+        if not df.empty:
+            self.agregar_lote(df, estado)
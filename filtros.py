@@ -0,0 +1,168 @@
+# === FILTROS MULTIDIMENSIONALES ===
+# Índices que se arman una vez por versión de los datos para que combinar
+# filtros en el dashboard no recorra el DataFrame:
+#   - categóricos (distrito, barrio, tipo de local, sexo, escolaridad): una
+#     máscara booleana por valor, creada al primer uso a partir de los
+#     códigos de la categoría; varios valores de un filtro se unen con OR y
+#     filtros distintos con AND
+#   - rangos (edad, fecha): los valores ordenados una vez; un rango se
+#     resuelve con dos búsquedas binarias
+# Con la máscara final los conteos salen de np.bincount (selección única) o
+# de sumar columnas de la matriz de indicadores (selección múltiple).
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from catalogo import PREGUNTAS_POR_ID, COLUMNA_FECHA, OPCIONES_MULTIPLES
+
+FILTROS_CATEGORICOS = [
+    PREGUNTAS_POR_ID[id_pregunta].columna
+    for id_pregunta in ["distrito", "barrio", "tipo_local", "sexo", "escolaridad"]
+]
+COLUMNA_EDAD = PREGUNTAS_POR_ID["edad"].columna
+
+
+class IndiceOrdenado:
+    # Posiciones de las filas ordenadas por valor; los vacíos (NaN) quedan fuera
+    def __init__(self, valores=()):
+        self.orden = np.empty(0, dtype="int64")
+        self.valores = np.empty(0, dtype="float64")
+        self.filas = 0
+        self.agregar(valores)
+
+    def agregar(self, valores):
+        # Filas nuevas al final de los datos: se ordenan solo ellas y se
+        # intercalan con búsqueda binaria (casi siempre van todas al final)
+        valores = np.asarray(valores, dtype="float64")
+        validos = ~np.isnan(valores)
+        posiciones = np.flatnonzero(validos) + self.filas
+        self.filas += len(valores)
+        nuevos = valores[validos]
+        if not len(nuevos):
+            return
+        orden = np.argsort(nuevos, kind="stable")
+        nuevos, posiciones = nuevos[orden], posiciones[orden]
+        if not len(self.valores) or nuevos[0] >= self.valores[-1]:
+            self.valores = np.concatenate([self.valores, nuevos])
+            self.orden = np.concatenate([self.orden, posiciones])
+        else:
+            destino = np.searchsorted(self.valores, nuevos, side="right")
+            self.valores = np.insert(self.valores, destino, nuevos)
+            self.orden = np.insert(self.orden, destino, posiciones)
+
+    def contar(self, desde=None, hasta=None):
+        inicio, fin = self.limites(desde, hasta)
+        return int(fin - inicio)
+
+    def minimo(self):
+        return self.valores[0] if len(self.valores) else None
+
+    def maximo(self):
+        return self.valores[-1] if len(self.valores) else None
+
+    def limites(self, desde=None, hasta=None):
+        # Primera y última+1 posición dentro de self.valores, ambos extremos incluidos
+        inicio = 0 if desde is None else np.searchsorted(self.valores, desde, side="left")
+        fin = len(self.valores) if hasta is None else np.searchsorted(self.valores, hasta, side="right")
+        return inicio, max(inicio, fin)
+
+    def mascara(self, desde=None, hasta=None):
+        inicio, fin = self.limites(desde, hasta)
+        mascara = np.zeros(self.filas, dtype=bool)
+        mascara[self.orden[inicio:fin]] = True
+        return mascara
+
+
+def fechas_como_numero(serie):
+    # Nanosegundos desde epoch; NaT pasa a NaN
+    fechas = pd.to_datetime(serie, errors="coerce")
+    numeros = fechas.to_numpy(dtype="datetime64[ns]").astype("int64").astype("float64")
+    numeros[fechas.isna().to_numpy()] = np.nan
+    return numeros
+
+
+class IndiceFiltros:
+    def __init__(self, df, indicadores):
+        self.filas = len(df)
+        # Códigos de cada columna de selección única: sirven para las máscaras
+        # de los filtros y para los conteos
+        self._codigos = {}
+        for columna in df.columns:
+            serie = df[columna]
+            if columna in FILTROS_CATEGORICOS and not isinstance(serie.dtype, pd.CategoricalDtype):
+                serie = serie.astype(str).astype("category")
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                self._codigos[columna] = (serie.cat.codes.to_numpy(), list(serie.cat.categories))
+        self._mascaras = {}
+        self._bloqueo = threading.Lock()
+
+        self.edad = IndiceOrdenado(pd.to_numeric(df[COLUMNA_EDAD], errors="coerce")) if COLUMNA_EDAD in df.columns else None
+        self.fecha = IndiceOrdenado(fechas_como_numero(df[COLUMNA_FECHA])) if COLUMNA_FECHA in df.columns else None
+
+        self._indicadores = {}
+        columnas_multiples = set(indicadores.columns.get_level_values(0)) if len(indicadores.columns) else set()
+        for columna in OPCIONES_MULTIPLES:
+            if columna in columnas_multiples:
+                bloque = indicadores[columna]
+                self._indicadores[columna] = (bloque.sparse.to_dense().to_numpy(dtype=bool), list(bloque.columns))
+        # Columnas que se pueden contar
+        self.columnas = set(self._codigos) | set(self._indicadores)
+
+    def valores(self, columna, mascara=None):
+        # Valores presentes en los datos (o en las filas de la máscara), en el orden del catálogo
+        if columna not in self._codigos:
+            return []
+        codigos, categorias = self._codigos[columna]
+        if mascara is not None:
+            codigos = codigos[mascara]
+        presentes = np.bincount(codigos[codigos >= 0], minlength=len(categorias)) > 0
+        return [categoria for categoria, presente in zip(categorias, presentes) if presente and categoria != ""]
+
+    def mascara_valor(self, columna, valor):
+        clave = (columna, valor)
+        if clave not in self._mascaras:
+            codigos, categorias = self._codigos[columna]
+            mascara = codigos == categorias.index(valor) if valor in categorias else np.zeros(self.filas, dtype=bool)
+            with self._bloqueo:
+                self._mascaras[clave] = mascara
+        return self._mascaras[clave]
+
+    def mascara(self, seleccion=None, edad=None, fechas=None):
+        # seleccion: {columna: [valores]}; edad: (mín, máx); fechas: (Timestamp, Timestamp)
+        # Devuelve None si no hay ningún filtro activo
+        mascara = None
+        for columna, valores in (seleccion or {}).items():
+            if not valores or columna not in self._codigos:
+                continue
+            union = np.zeros(self.filas, dtype=bool)
+            for valor in valores:
+                union |= self.mascara_valor(columna, valor)
+            mascara = union if mascara is None else mascara & union
+        if edad is not None and self.edad is not None:
+            rango = self.edad.mascara(*edad)
+            mascara = rango if mascara is None else mascara & rango
+        if fechas is not None and self.fecha is not None:
+            desde, hasta = (pd.Timestamp(fecha).value for fecha in fechas)
+            rango = self.fecha.mascara(desde, hasta)
+            mascara = rango if mascara is None else mascara & rango
+        return mascara
+
+    def total(self, mascara=None):
+        return self.filas if mascara is None else int(mascara.sum())
+
+    def conteos(self, columna, mascara=None):
+        # opción → cantidad, sin vacíos ni ceros, listo para los gráficos
+        if columna in self._codigos:
+            codigos, categorias = self._codigos[columna]
+            elegidos = codigos if mascara is None else codigos[mascara]
+            cantidades = np.bincount(elegidos[elegidos >= 0], minlength=len(categorias))
+            serie = pd.Series(cantidades, index=categorias, dtype="int64")
+        elif columna in self._indicadores:
+            matriz, opciones = self._indicadores[columna]
+            elegidas = matriz if mascara is None else matriz[mascara]
+            serie = pd.Series(elegidas.sum(axis=0), index=opciones, dtype="int64")
+        else:
+            return pd.Series(dtype="int64")
+        return serie[(serie > 0) & (serie.index != "")]
@@ -0,0 +1,225 @@
+# === GRÁFICOS DEL DASHBOARD ===
+# Las figuras se arman aquí y no dentro de dashboard.py para que el
+# dashboard en vivo y las instantáneas de materializar.py muestren
+# exactamente lo mismo. Cada sección es un subtítulo (o None para seguir bajo
+# el anterior) con una figura de plotly o un aviso cuando no hay datos.
+
+from dataclasses import dataclass
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from busqueda import COLUMNAS_FRECUENTES
+from serie_temporal import TOTAL, FRECUENCIAS, VENTANA_MOVIL, media_movil, proporciones
+
+TERMINOS_POR_DISTRITO = 10
+
+
+@dataclass
+class Seccion:
+    titulo: str = None
+    figura: go.Figure = None
+    aviso: str = None
+
+
+def secciones_tiempo(serie, agrupacion, desde=None, hasta=None, mascara=None):
+    frecuencia = FRECUENCIAS[agrupacion]
+    envios = serie.tabla(TOTAL, frecuencia, desde, hasta, mascara)
+    if envios.empty:
+        return [Seccion("Formularios Recibidos en el Tiempo", aviso="No hay formularios con fecha en el rango elegido.")]
+
+    fig_tiempo = px.bar(
+        envios.reset_index(),
+        x="Fecha",
+        y=TOTAL,
+        title=f"Formularios por {agrupacion.lower()}"
+    )
+    if frecuencia == "D":
+        fig_tiempo.add_scatter(
+            x=envios.index,
+            y=media_movil(envios[TOTAL]),
+            mode="lines",
+            name=f"Promedio móvil {VENTANA_MOVIL} días"
+        )
+    secciones = [Seccion("Formularios Recibidos en el Tiempo", fig_tiempo)]
+
+    # Porcentaje de cada respuesta por período; por día se suaviza con
+    # una ventana móvil para que los días con pocos envíos no dominen
+    for columna, titulo in (
+        ("Percepción de seguridad", "Tendencia de la Percepción de Seguridad"),
+        ("Victimización", "Tendencia de la Victimización"),
+    ):
+        tabla = serie.tabla(columna, frecuencia, desde, hasta, mascara)
+        if tabla.empty:
+            continue
+        porcentajes = proporciones(tabla, VENTANA_MOVIL if frecuencia == "D" else None)
+        fig_tendencia = px.line(
+            porcentajes.reset_index().melt(id_vars="Fecha", var_name="Respuesta", value_name="Porcentaje"),
+            x="Fecha",
+            y="Porcentaje",
+            color="Respuesta",
+            title=titulo,
+            labels={"Porcentaje": "% de formularios"}
+        )
+        secciones.append(Seccion(figura=fig_tendencia))
+    return secciones
+
+
+def secciones_conteos(indice, mascara=None):
+    secciones = []
+
+    # === PERCEPCIÓN DE SEGURIDAD ===
+    if "Percepción de seguridad" in indice.columnas:
+        percepcion = indice.conteos("Percepción de seguridad", mascara)
+        fig1 = px.pie(
+            names=percepcion.index,
+            values=percepcion.values,
+            title="Percepción de Seguridad",
+            hole=0.4
+        )
+        secciones.append(Seccion("Percepción de Seguridad", fig1))
+
+    # === FACTORES DE INSEGURIDAD ===
+    if "Factores de inseguridad (selección múltiple)" in indice.columnas:
+        factores = indice.conteos("Factores de inseguridad (selección múltiple)", mascara)
+        factores_df = factores.rename_axis("Factor").reset_index(name="count")
+
+        if not factores_df.empty:
+            fig2 = px.bar(
+                factores_df,
+                x="Factor",
+                y="count",
+                title="Factores de Inseguridad",
+                color_discrete_sequence=["indianred"]
+            )
+            fig2.update_layout(
+                yaxis=dict(tickmode='linear', dtick=1)
+            )
+            secciones.append(Seccion("Factores de Inseguridad Reportados", fig2))
+        else:
+            secciones.append(Seccion("Factores de Inseguridad Reportados", aviso="No hay datos suficientes de factores de inseguridad."))
+
+    # === TIPOS DE DELITOS REPORTADOS ===
+    if "Tipo de delito" in indice.columnas:
+        delitos = indice.conteos("Tipo de delito", mascara)
+        delitos_df = delitos.rename_axis("Delito").reset_index(name="count")
+
+        if not delitos_df.empty:
+            fig3 = px.bar(
+                delitos_df,
+                x="Delito",
+                y="count",
+                title="Frecuencia de Tipos de Delito",
+                color_discrete_sequence=["darkblue"]
+            )
+            fig3.update_layout(
+                yaxis=dict(tickmode='linear', dtick=1)
+            )
+            secciones.append(Seccion("Tipos de Delitos Reportados", fig3))
+        else:
+            secciones.append(Seccion("Tipos de Delitos Reportados", aviso="No hay datos suficientes de delitos reportados."))
+
+    # === VICTIMIZACIÓN ===
+    if "Victimización" in indice.columnas:
+        victimizacion = indice.conteos("Victimización", mascara)
+        fig4 = px.pie(
+            names=victimizacion.index,
+            values=victimizacion.values,
+            title="¿Han sido víctimas de delitos?",
+            hole=0.5
+        )
+        secciones.append(Seccion("Victimización Comercial", fig4))
+
+    # === MODO DE OPERAR DELICTIVO ===
+    if "Modo de operar delictivo" in indice.columnas:
+        modos = indice.conteos("Modo de operar delictivo", mascara)
+        modos_df = modos.sort_values(ascending=False).rename_axis("Modo").reset_index(name="count")
+
+        if not modos_df.empty:
+            fig5 = px.bar(
+                modos_df,
+                x="Modo",
+                y="count",
+                labels={"count": "Cantidad"},
+                title="Modos de Operar Delictivo"
+            )
+            fig5.update_layout(
+                yaxis=dict(tickmode='linear', dtick=1)
+            )
+            secciones.append(Seccion("Modos de Operar Delictivo Observados", fig5))
+        else:
+            secciones.append(Seccion("Modos de Operar Delictivo Observados", aviso="No hay datos suficientes sobre modos de operar."))
+
+    # === HORARIOS DE DELITOS ===
+    if "Horario del hecho" in indice.columnas:
+        horario_df = indice.conteos("Horario del hecho", mascara)
+
+        if not horario_df.empty:
+            horario_df = horario_df.reset_index()
+            horario_df.columns = ["Horario", "Cantidad"]
+            orden_horarios = [
+                "00:00 - 02:59 a.m.", "03:00 - 05:59 a.m.", "06:00 - 08:59 a.m.",
+                "09:00 - 11:59 a.m.", "12:00 - 14:59 p.m.", "15:00 - 17:59 p.m.",
+                "18:00 - 20:59 p.m.", "21:00 - 23:59 p.m.", "Desconocido"
+            ]
+            horario_df["Horario"] = pd.Categorical(horario_df["Horario"], categories=orden_horarios, ordered=True)
+            horario_df = horario_df.sort_values("Horario")
+            fig6 = px.line(
+                horario_df,
+                x="Horario",
+                y="Cantidad",
+                markers=True,
+                title="Frecuencia de delitos por horario",
+                labels={"Cantidad": "Cantidad de delitos", "Horario": "Rango horario"}
+            )
+            fig6.update_layout(
+                yaxis=dict(tickmode='linear', dtick=1)
+            )
+            secciones.append(Seccion("Horarios en los que ocurren más delitos", fig6))
+        else:
+            secciones.append(Seccion("Horarios en los que ocurren más delitos", aviso="No hay datos suficientes sobre horarios de delitos."))
+
+    return secciones
+
+
+def secciones_terminos(indice_texto, indice, mascara=None, cantidad=TERMINOS_POR_DISTRITO):
+    # Términos más usados en las respuestas abiertas, un panel por distrito
+    titulo = "Términos más Mencionados en Respuestas Abiertas"
+    grupos = [(None, None)]
+    if "Distrito" in indice.columnas:
+        grupos = [(distrito, indice.mascara_valor("Distrito", distrito)) for distrito in indice.valores("Distrito", mascara)]
+    tablas = []
+    for distrito, mascara_distrito in grupos:
+        if mascara is not None:
+            mascara_distrito = mascara if mascara_distrito is None else mascara_distrito & mascara
+        frecuentes = indice_texto.frecuentes(mascara_distrito, COLUMNAS_FRECUENTES, cantidad)
+        tablas.append(frecuentes.reset_index().assign(Distrito=distrito or "Todos"))
+    terminos_df = pd.concat(tablas, ignore_index=True) if tablas else pd.DataFrame()
+    if terminos_df.empty:
+        return [Seccion(titulo, aviso="No hay respuestas abiertas con términos para mostrar.")]
+
+    fig7 = px.bar(
+        terminos_df,
+        x="Menciones",
+        y="Término",
+        facet_col="Distrito",
+        orientation="h",
+        title="Términos más usados por distrito"
+    )
+    # Cada distrito tiene sus propios términos, del más usado hacia abajo
+    fig7.update_yaxes(matches=None, showticklabels=True, autorange="reversed", title=None)
+    fig7.for_each_annotation(lambda anotacion: anotacion.update(text=anotacion.text.split("=")[-1]))
+    return [Seccion(titulo, fig7)]
+
+
+def semana_actual(serie, mascara=None):
+    # (envíos de los 7 días que terminan en el último envío, de los 7 anteriores);
+    # con máscara se cuentan solo las filas filtradas, sobre las mismas semanas
+    ultima_fecha = serie.ultima_fecha()
+    if ultima_fecha is None:
+        return None
+    fin_semana = ultima_fecha.normalize() + pd.Timedelta(days=1) - pd.Timedelta(1)
+    ultimos = serie.contar(fin_semana - pd.Timedelta(days=7) + pd.Timedelta(1), fin_semana, mascara)
+    anteriores = serie.contar(fin_semana - pd.Timedelta(days=14) + pd.Timedelta(1), fin_semana - pd.Timedelta(days=7), mascara)
+    return ultimos, anteriores
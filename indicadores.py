@@ -0,0 +1,55 @@
+# === MATRIZ DE INDICADORES PARA PREGUNTAS DE SELECCIÓN MÚLTIPLE ===
+# Convierte cada respuesta de selección múltiple (códigos "1,4" o texto unido
+# con ", ") en columnas booleanas dispersas (pregunta, opción). Conteos,
+# filtros y cruces pasan a ser sumas de columnas en lugar de separar cadenas
+# en cada recarga del dashboard.
+
+import pandas as pd
+
+from catalogo import OPCIONES_MULTIPLES, SEPARADOR_MULTIPLE, SEPARADOR_CODIGOS, es_codigo_multiple
+
+TIPO_INDICADOR = pd.SparseDtype(bool, False)
+
+
+def decodificar_multiple(serie, opciones):
+    # Hay pocas combinaciones distintas aunque haya muchas filas: cada una se
+    # decodifica una vez y el resultado se expande por posición
+    posiciones, distintas = pd.factorize(serie.fillna("").astype(str))
+    texto = pd.Series(distintas, dtype=object)
+    con_codigos = es_codigo_multiple(texto)
+
+    # Filas con códigos: la columna "3" corresponde a la tercera opción
+    por_codigo = texto[con_codigos].str.get_dummies(sep=SEPARADOR_CODIGOS)
+    por_codigo = por_codigo.rename(columns=lambda codigo: opciones[int(codigo) - 1]
+                                   if 1 <= int(codigo) <= len(opciones) else codigo)
+    por_texto = texto[~con_codigos].str.get_dummies(sep=SEPARADOR_MULTIPLE)
+
+    marcadas = pd.concat([por_codigo, por_texto]).reindex(texto.index).fillna(0)
+    marcadas = marcadas.drop(columns=[""], errors="ignore")
+    # Las opciones del catálogo van primero y en orden; las desconocidas
+    # (respuestas antiguas o editadas a mano) se conservan al final
+    extras = [opcion for opcion in marcadas.columns if opcion not in opciones]
+    marcadas = marcadas.reindex(columns=list(opciones) + extras, fill_value=0).astype(bool)
+    valores = marcadas.to_numpy()[posiciones] if len(marcadas) else marcadas.to_numpy().reshape(len(serie), -1)
+    return pd.DataFrame(valores, index=serie.index, columns=marcadas.columns).astype(TIPO_INDICADOR)
+
+
+def matriz_indicadores(df):
+    bloques = {
+        columna: decodificar_multiple(df[columna], opciones)
+        for columna, opciones in OPCIONES_MULTIPLES.items()
+        if columna in df.columns
+    }
+    if not bloques:
+        return pd.DataFrame(index=df.index)
+    return pd.concat(bloques, axis=1, names=["Pregunta", "Opción"])
+
+
+def contar_opciones(indicadores, columna, filas=None):
+    # filas: máscara o índice opcional para restringir el conteo (p. ej. un distrito)
+    if columna not in indicadores.columns.get_level_values(0):
+        return pd.Series(dtype="int64")
+    bloque = indicadores[columna]
+    if filas is not None:
+        bloque = bloque.loc[filas]
+    return bloque.sum().astype("int64")
@@ -0,0 +1,67 @@
+# === LÍMITE DE ESCRITURAS A GOOGLE SHEETS ===
+# Cubo de tokens compartido por todas las escrituras del proceso. La API de
+# Sheets permite 60 escrituras por minuto por usuario; se deja un margen y se
+# limita la ráfaga para no pasar del tope en ninguna ventana de un minuto.
+# Los errores 429 y 5xx se reintentan con espera exponencial y jitter.
+
+import random
+import threading
+import time
+
+ESCRITURAS_POR_MINUTO = 50
+RAFAGA = 5
+ESPERA_MINIMA = 1.0
+ESPERA_MAXIMA = 120.0
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class CuboTokens:
+    def __init__(self, por_minuto=ESCRITURAS_POR_MINUTO, capacidad=RAFAGA):
+        self.tasa = por_minuto / 60.0
+        self.capacidad = capacidad
+        self._tokens = float(capacidad)
+        self._ultimo = time.monotonic()
+        self._bloqueo = threading.Lock()
+
+    def _recargar(self):
+        ahora = time.monotonic()
+        self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    def esperar(self, tokens=1):
+        # Bloquea hasta que haya cupo y lo consume
+        while True:
+            with self._bloqueo:
+                self._recargar()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                faltante = (tokens - self._tokens) / self.tasa
+            time.sleep(faltante)
+
+    def penalizar(self, segundos):
+        # Tras un 429 nadie en el proceso escribe durante `segundos`
+        with self._bloqueo:
+            self._recargar()
+            self._tokens = min(self._tokens, 0.0) - segundos * self.tasa
+
+
+def codigo_http(error):
+    respuesta = getattr(error, "response", None)
+    return getattr(respuesta, "status_code", None) or getattr(error, "code", None)
+
+
+def es_reintentable(error):
+    codigo = codigo_http(error)
+    if codigo is None:
+        # Sin respuesta HTTP: red caída, tiempo agotado o conexión no disponible
+        return True
+    return codigo in CODIGOS_REINTENTABLES
+
+
+def espera_con_jitter(intento, minima=ESPERA_MINIMA, maxima=ESPERA_MAXIMA):
+    # "Full jitter": un valor al azar entre la espera mínima y el tope exponencial
+    return random.uniform(minima, min(maxima, minima * 2 ** intento))
+
+
+LIMITADOR_ESCRITURAS = CuboTokens()
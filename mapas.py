@@ -0,0 +1,129 @@
+# === MAPA DE UBICACIONES DEL DASHBOARD ===
+# Las coordenadas salen de columnas numéricas (o de un str.extract vectorizado
+# sobre el enlace) y se dibujan con FastMarkerCluster: un solo arreglo de
+# puntos que el navegador agrupa, en lugar de un folium.Marker por fila.
+#
+# Los modos de zonas y de calor reciben celdas ya agregadas (rejilla.py), no
+# respuestas, así el HTML no crece con la cantidad de formularios.
+
+import folium
+from branca.colormap import LinearColormap
+from folium.plugins import FastMarkerCluster, HeatMap
+import pandas as pd
+
+from catalogo import COLUMNA_UBICACION, COLUMNA_LATITUD, COLUMNA_LONGITUD
+from espejo_local import PATRON_COORDENADAS
+
+CENTRO_MAPA = [10.3, -85.8]
+MODO_ZONAS = "Zonas y capas"
+MODO_PUNTOS = "Puntos agrupados"
+MODO_CALOR = "Mapa de calor"
+COLORES_ZONAS = ["#ffffb2", "#fd8d3c", "#bd0026"]
+RADIO_CALOR = 18
+
+# Los mismos distritos que ofrece el formulario (catalogo.BARRIOS_POR_DISTRITO)
+colores_distrito = {
+    "Tamarindo": "blue",
+    "Cabo Velas (Flamingo)": "red",
+    "Tempate": "green"
+}
+
+# Cada punto llega como [lat, lon, distrito, color]
+CALLBACK_PUNTO = """
+function (fila) {
+    var punto = L.circleMarker(new L.LatLng(fila[0], fila[1]), {
+        radius: 7, color: fila[3], fillColor: fila[3], fillOpacity: 0.8
+    });
+    punto.bindTooltip(fila[2]);
+    return punto;
+}
+"""
+
+
+def coordenadas(df):
+    lat = pd.Series(float("nan"), index=df.index)
+    lon = pd.Series(float("nan"), index=df.index)
+    if COLUMNA_LATITUD in df.columns and COLUMNA_LONGITUD in df.columns:
+        lat = pd.to_numeric(df[COLUMNA_LATITUD], errors="coerce")
+        lon = pd.to_numeric(df[COLUMNA_LONGITUD], errors="coerce")
+    if COLUMNA_UBICACION in df.columns and (lat.isna().any() or lon.isna().any()):
+        # Filas anteriores a las columnas numéricas: se leen del enlace
+        extraidas = df[COLUMNA_UBICACION].astype(str).str.extract(PATRON_COORDENADAS)
+        lat = lat.fillna(pd.to_numeric(extraidas[0], errors="coerce"))
+        lon = lon.fillna(pd.to_numeric(extraidas[1], errors="coerce"))
+    distrito = df["Distrito"].astype(str) if "Distrito" in df.columns else ""
+    puntos = pd.DataFrame({"lat": lat, "lon": lon, "distrito": distrito})
+    return puntos.dropna(subset=["lat", "lon"])
+
+
+def _puntos_calor(calor, capa):
+    # [lat, lon, peso] con el peso entre 0 y 1, como lo espera leaflet.heat
+    datos = calor.loc[calor[capa] > 0, ["lat", "lon", capa]].astype("float64")
+    if not datos.empty:
+        datos[capa] = datos[capa] / datos[capa].max()
+    return datos.round({"lat": 5, "lon": 5, capa: 3}).values.tolist()
+
+
+def construir_mapa(puntos, modo=MODO_PUNTOS):
+    # puntos: coordenadas() para los puntos agrupados; para el calor, las
+    # celdas de RejillaEspacial.calor() con su conteo en "Formularios"
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=11)
+    if modo == MODO_CALOR:
+        HeatMap(_puntos_calor(puntos, "Formularios"), radius=RADIO_CALOR).add_to(mapa)
+    else:
+        datos = puntos.assign(color=puntos["distrito"].map(colores_distrito).fillna("gray"))
+        FastMarkerCluster(
+            datos[["lat", "lon", "distrito", "color"]].values.tolist(),
+            callback=CALLBACK_PUNTO,
+        ).add_to(mapa)
+    return mapa
+
+
+def _zonas_geojson(zonas, capa, escala):
+    # Un rectángulo por celda con el color ya calculado
+    elementos = []
+    for zona in zonas.to_dict("records"):
+        esquinas = [
+            [zona["lon_min"], zona["lat_min"]], [zona["lon_max"], zona["lat_min"]],
+            [zona["lon_max"], zona["lat_max"]], [zona["lon_min"], zona["lat_max"]],
+            [zona["lon_min"], zona["lat_min"]],
+        ]
+        elementos.append({
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [esquinas]},
+            "properties": {
+                "celda": zona["celda"], "valor": float(zona[capa]), "formularios": int(zona["Formularios"]),
+                "color": escala(zona[capa]),
+            },
+        })
+    return {"type": "FeatureCollection", "features": elementos}
+
+
+def construir_mapa_zonas(zonas, calor):
+    # zonas: RejillaEspacial.zonas(), una capa coloreada por cada columna de
+    # valores; calor: RejillaEspacial.calor(), una capa de calor por delito.
+    # Solo la primera capa empieza visible; el control permite alternarlas.
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=11)
+    capas_zonas = [columna for columna in zonas.columns if columna not in ("celda", "lat_min", "lat_max", "lon_min", "lon_max")]
+    for posicion, capa in enumerate(capas_zonas):
+        maximo = 100.0 if capa.startswith("%") else max(float(zonas[capa].max()), 1.0)
+        escala = LinearColormap(COLORES_ZONAS, vmin=0, vmax=maximo)
+        grupo = folium.FeatureGroup(name=capa, show=posicion == 0)
+        folium.GeoJson(
+            _zonas_geojson(zonas, capa, escala),
+            style_function=lambda elemento: {
+                "fillColor": elemento["properties"]["color"], "color": "#555555",
+                "weight": 0.5, "fillOpacity": 0.6,
+            },
+            tooltip=folium.GeoJsonTooltip(
+                fields=["celda", "valor", "formularios"], aliases=["Celda", capa, "Formularios"]
+            ),
+        ).add_to(grupo)
+        grupo.add_to(mapa)
+
+    for capa in calor.columns.drop(["lat", "lon", "Formularios"], errors="ignore"):
+        grupo = folium.FeatureGroup(name=f"Calor: {capa}", show=False)
+        HeatMap(_puntos_calor(calor, capa), radius=RADIO_CALOR).add_to(grupo)
+        grupo.add_to(mapa)
+    folium.LayerControl(collapsed=False).add_to(mapa)
+    return mapa
@@ -0,0 +1,204 @@
+# === INSTANTÁNEAS DEL DASHBOARD ===
+# Uso: python materializar.py [--directorio instantaneas] [--intervalo 15] [--una-vez]
+#
+# Proceso aparte que lee la hoja (un solo lector para todas las réplicas del
+# dashboard), calcula todo lo que muestra el dashboard para el total y para
+# cada distrito y lo guarda en una instantánea:
+#
+#   instantaneas/
+#     actual.json                  nombre de la última instantánea completa
+#     20261018T153000-v12/
+#       manifiesto.json            versión, filas, distritos, semana actual
+#       todos/ y <distrito>/
+#         resumen.json             total de formularios y envíos de la semana actual
+#         conteos.json             conteo por opción de cada gráfico
+#         serie_diaria.parquet     envíos y respuestas por día
+#         figuras.json             figuras de plotly serializadas, por agrupación
+#         mapa.html                mapa de zonas y capas
+#
+# La instantánea se escribe en un directorio temporal y se publica con un
+# rename; actual.json se reemplaza al final, así un lector nunca ve una a
+# medias. Con ENCUESTA_INSTANTANEAS=instantaneas el dashboard sirve la última
+# instantánea en lugar de leer la hoja.
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+import unicodedata
+from datetime import datetime
+
+import pandas as pd
+import plotly.io as pio
+
+from almacenamiento import crear_almacenamiento
+from espejo_local import EspejoRespuestas
+from filtros import IndiceFiltros
+from graficos import Seccion, secciones_conteos, secciones_tiempo, semana_actual
+from indicadores import matriz_indicadores
+from mapas import construir_mapa_zonas
+from metricas import contar, iniciar_exportacion, medir
+from rejilla import RejillaEspacial
+from serie_temporal import SerieTemporal, FRECUENCIAS, TOTAL, COLUMNAS_TENDENCIA
+from sincronizacion import SincronizadorRespuestas
+
+DIRECTORIO_INSTANTANEAS = "instantaneas"
+VARIABLE_INSTANTANEAS = "ENCUESTA_INSTANTANEAS"
+ARCHIVO_ACTUAL = "actual.json"
+# El sondeo de la revisión es barato; las filas solo se piden si cambió
+INTERVALO = 15.0
+CONSERVAR = 3
+TODOS = "Todos"
+
+registro = logging.getLogger("encuesta.instantaneas")
+
+
+def clave_distrito(nombre):
+    # "Cabo Velas (Flamingo)" → "cabo-velas-flamingo"
+    texto = unicodedata.normalize("NFKD", nombre).encode("ascii", "ignore").decode().lower()
+    return "-".join("".join(c if c.isalnum() else " " for c in texto).split())
+
+
+def _escribir_json(ruta, datos):
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, default=str)
+
+
+def _secciones_json(secciones):
+    return [
+        {"titulo": s.titulo, "figura": s.figura.to_json() if s.figura is not None else None, "aviso": s.aviso}
+        for s in secciones
+    ]
+
+
+def leer_secciones(datos):
+    return [
+        Seccion(s["titulo"], pio.from_json(s["figura"]) if s["figura"] else None, s["aviso"])
+        for s in datos
+    ]
+
+
+def _materializar_distrito(destino, indice, serie, rejilla, mascara):
+    os.makedirs(destino)
+    resumen = {"total": indice.total(mascara), "semana": semana_actual(serie, mascara)}
+    _escribir_json(os.path.join(destino, "resumen.json"), resumen)
+    conteos = {columna: indice.conteos(columna, mascara).to_dict() for columna in sorted(indice.columnas)}
+    _escribir_json(os.path.join(destino, "conteos.json"), conteos)
+
+    # Tablas diarias en una sola tabla: "pregunta: opción" por columna
+    tablas = [serie.tabla(columna, mascara=mascara).add_prefix(f"{columna}: ") for columna in COLUMNAS_TENDENCIA]
+    diaria = pd.concat([serie.tabla(TOTAL, mascara=mascara)] + tablas, axis=1)
+    diaria.to_parquet(os.path.join(destino, "serie_diaria.parquet"))
+
+    figuras = {
+        "tiempo": {agrupacion: _secciones_json(secciones_tiempo(serie, agrupacion, mascara=mascara))
+                   for agrupacion in FRECUENCIAS},
+        "conteos": _secciones_json(secciones_conteos(indice, mascara)),
+    }
+    _escribir_json(os.path.join(destino, "figuras.json"), figuras)
+
+    calor = rejilla.calor(mascara)
+    if not calor.empty:
+        html = construir_mapa_zonas(rejilla.zonas(mascara), calor).get_root().render()
+        with open(os.path.join(destino, "mapa.html"), "w", encoding="utf-8") as archivo:
+            archivo.write(html)
+
+
+def materializar(df, version, directorio=DIRECTORIO_INSTANTANEAS, serie=None):
+    # Escribe una instantánea completa y la publica; devuelve su nombre
+    with medir("instantanea"):
+        creada = datetime.now()
+        nombre = f"{creada:%Y%m%dT%H%M%S}-v{version}"
+        temporal = os.path.join(directorio, f".{nombre}.tmp")
+        shutil.rmtree(temporal, ignore_errors=True)
+        os.makedirs(temporal)
+
+        indicadores = matriz_indicadores(df)
+        indice = IndiceFiltros(df, indicadores)
+        rejilla = RejillaEspacial(df, indicadores)
+        serie = serie or SerieTemporal()
+        serie.actualizar(df)
+
+        distritos = [{"nombre": TODOS, "clave": "todos"}] + [
+            {"nombre": distrito, "clave": clave_distrito(distrito)} for distrito in indice.valores("Distrito")
+        ]
+        for distrito in distritos:
+            mascara = None if distrito["nombre"] == TODOS else indice.mascara({"Distrito": [distrito["nombre"]]})
+            _materializar_distrito(os.path.join(temporal, distrito["clave"]), indice, serie, rejilla, mascara)
+
+        manifiesto = {
+            "nombre": nombre,
+            "version": version,
+            "creada": creada.isoformat(timespec="seconds"),
+            "filas": len(df),
+            "distritos": distritos,
+            "semana": semana_actual(serie),
+        }
+        _escribir_json(os.path.join(temporal, "manifiesto.json"), manifiesto)
+        os.replace(temporal, os.path.join(directorio, nombre))
+
+        actual = os.path.join(directorio, ARCHIVO_ACTUAL)
+        _escribir_json(actual + ".tmp", manifiesto)
+        os.replace(actual + ".tmp", actual)
+        contar("instantanea_publicada")
+        _podar(directorio, nombre)
+        return nombre
+
+
+def _podar(directorio, actual):
+    # Se conservan las últimas CONSERVAR; un lector puede estar leyendo la anterior
+    nombres = sorted(n for n in os.listdir(directorio) if not n.startswith(".") and n != ARCHIVO_ACTUAL
+                     and os.path.isdir(os.path.join(directorio, n)))
+    for nombre in nombres[:-CONSERVAR]:
+        if nombre != actual:
+            shutil.rmtree(os.path.join(directorio, nombre), ignore_errors=True)
+
+
+def leer_actual(directorio=DIRECTORIO_INSTANTANEAS):
+    # Manifiesto de la última instantánea publicada, o None si aún no hay
+    try:
+        with open(os.path.join(directorio, ARCHIVO_ACTUAL), encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+
+def ejecutar(directorio=DIRECTORIO_INSTANTANEAS, intervalo=INTERVALO, una_vez=False):
+    os.makedirs(directorio, exist_ok=True)
+    sincronizador = SincronizadorRespuestas(crear_almacenamiento("Respuestas"), espejo=EspejoRespuestas())
+    # La serie vive todo el proceso y solo procesa las filas nuevas
+    serie = SerieTemporal()
+    publicada = None
+    while True:
+        try:
+            sincronizador.actualizar()
+            df, version = sincronizador.instantanea()
+            if df.empty:
+                registro.info("Aún no hay respuestas; no se publica instantánea")
+            elif version != publicada:
+                nombre = materializar(df, version, directorio, serie)
+                registro.info("Instantánea %s publicada (%d filas)", nombre, len(df))
+                publicada = version
+        except Exception:
+            contar("instantanea_fallida")
+            registro.exception("No se pudo materializar la instantánea")
+            if una_vez:
+                raise
+        if una_vez:
+            return
+        time.sleep(intervalo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materializa las instantáneas que sirve el dashboard.")
+    parser.add_argument("--directorio", default=os.environ.get(VARIABLE_INSTANTANEAS, DIRECTORIO_INSTANTANEAS),
+                        help="Directorio de las instantáneas")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO, help="Segundos entre sondeos de la hoja")
+    parser.add_argument("--una-vez", action="store_true", help="Materializa una sola vez y termina")
+    argumentos = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    iniciar_exportacion()
+    ejecutar(argumentos.directorio, argumentos.intervalo, argumentos.una_vez)
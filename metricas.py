@@ -0,0 +1,190 @@
+# === MÉTRICAS DE TIEMPO Y EVENTOS ===
+# Registro compartido por todo el proceso (formulario o dashboard):
+#
+#   with medir("sheets_append"): ...      duración de una operación
+#   contar("cache_calculo", cache="mapa")  contador de eventos
+#
+# Las duraciones se agregan en un histograma por operación (como Prometheus)
+# y se guardan las últimas mediciones para calcular percentiles recientes.
+# Se exportan de dos formas, ambas opcionales:
+#   ENCUESTA_METRICAS_ARCHIVO=/ruta/encuesta.prom  archivo en formato texto de
+#       Prometheus, reescrito cada INTERVALO_EXPORTACION segundos (para el
+#       textfile collector de node_exporter o para leerlo a mano)
+#   ENCUESTA_METRICAS_JSON=1  cada medición como una línea JSON en el log
+#       "encuesta.metricas"
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+PREFIJO = "encuesta"
+LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECIENTES = 500
+INTERVALO_EXPORTACION = 15.0
+VARIABLE_ARCHIVO = "ENCUESTA_METRICAS_ARCHIVO"
+VARIABLE_JSON = "ENCUESTA_METRICAS_JSON"
+
+registro = logging.getLogger("encuesta.metricas")
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted(etiquetas.items()))
+
+
+def _etiquetas_prometheus(etiquetas):
+    if not etiquetas:
+        return ""
+    pares = ",".join(f'{nombre}="{str(valor).replace(chr(34), chr(39))}"' for nombre, valor in etiquetas)
+    return "{" + pares + "}"
+
+
+class Metricas:
+    def __init__(self, limites=LIMITES, recientes=RECIENTES):
+        self.limites = limites
+        self.inicio = time.time()
+        self._histogramas = {}
+        self._contadores = defaultdict(float)
+        self._recientes = defaultdict(lambda: deque(maxlen=recientes))
+        self._bloqueo = threading.Lock()
+        self.log_json = os.environ.get(VARIABLE_JSON) == "1"
+
+    def observar(self, operacion, segundos, **etiquetas):
+        clave = _clave(operacion, etiquetas)
+        with self._bloqueo:
+            histograma = self._histogramas.setdefault(
+                clave, {"cubetas": [0] * len(self.limites), "cantidad": 0, "suma": 0.0}
+            )
+            for posicion, limite in enumerate(self.limites):
+                if segundos <= limite:
+                    histograma["cubetas"][posicion] += 1
+            histograma["cantidad"] += 1
+            histograma["suma"] += segundos
+            self._recientes[clave].append((time.time(), segundos))
+        if self.log_json:
+            registro.info(json.dumps(
+                {"operacion": operacion, "segundos": round(segundos, 6), **etiquetas}, ensure_ascii=False
+            ))
+
+    def contar(self, evento, valor=1, **etiquetas):
+        with self._bloqueo:
+            self._contadores[_clave(evento, etiquetas)] += valor
+
+    @contextmanager
+    def medir(self, operacion, **etiquetas):
+        inicio = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.contar("error", operacion=operacion, **etiquetas)
+            raise
+        finally:
+            self.observar(operacion, time.perf_counter() - inicio, **etiquetas)
+
+    def resumen(self):
+        # Una fila por operación con percentiles de las últimas mediciones
+        with self._bloqueo:
+            copias = {clave: list(valores) for clave, valores in self._recientes.items()}
+            totales = {clave: dict(h, cubetas=list(h["cubetas"])) for clave, h in self._histogramas.items()}
+        filas = []
+        for (operacion, etiquetas), valores in sorted(copias.items()):
+            segundos = np.array([s for _, s in valores]) * 1000
+            filas.append({
+                "operacion": operacion + _etiquetas_prometheus(etiquetas),
+                "total": totales[(operacion, etiquetas)]["cantidad"],
+                "p50_ms": round(float(np.percentile(segundos, 50)), 1),
+                "p95_ms": round(float(np.percentile(segundos, 95)), 1),
+                "max_ms": round(float(segundos.max()), 1),
+                "ultima_ms": round(float(segundos[-1]), 1),
+                "hace_s": round(time.time() - valores[-1][0], 1),
+            })
+        return filas
+
+    def contadores(self):
+        with self._bloqueo:
+            return {
+                evento + _etiquetas_prometheus(etiquetas): valor
+                for (evento, etiquetas), valor in sorted(self._contadores.items())
+            }
+
+    def valor(self, evento, **etiquetas):
+        with self._bloqueo:
+            return self._contadores.get(_clave(evento, etiquetas), 0)
+
+    def texto_prometheus(self):
+        with self._bloqueo:
+            histogramas = {clave: dict(h, cubetas=list(h["cubetas"])) for clave, h in self._histogramas.items()}
+            contadores = dict(self._contadores)
+
+        lineas = [
+            f"# HELP {PREFIJO}_duracion_segundos Duración de operaciones instrumentadas",
+            f"# TYPE {PREFIJO}_duracion_segundos histogram",
+        ]
+        for (operacion, etiquetas), histograma in sorted(histogramas.items()):
+            base = (("operacion", operacion),) + etiquetas
+            for limite, cantidad in zip(self.limites, histograma["cubetas"]):
+                lineas.append(
+                    f"{PREFIJO}_duracion_segundos_bucket{_etiquetas_prometheus(base + (('le', limite),))} {cantidad}"
+                )
+            lineas.append(
+                f"{PREFIJO}_duracion_segundos_bucket{_etiquetas_prometheus(base + (('le', '+Inf'),))} "
+                f"{histograma['cantidad']}"
+            )
+            lineas.append(f"{PREFIJO}_duracion_segundos_sum{_etiquetas_prometheus(base)} {histograma['suma']:.6f}")
+            lineas.append(f"{PREFIJO}_duracion_segundos_count{_etiquetas_prometheus(base)} {histograma['cantidad']}")
+
+        lineas += [
+            f"# HELP {PREFIJO}_eventos_total Eventos contados (caché, errores, filas)",
+            f"# TYPE {PREFIJO}_eventos_total counter",
+        ]
+        for (evento, etiquetas), valor in sorted(contadores.items()):
+            base = (("evento", evento),) + etiquetas
+            lineas.append(f"{PREFIJO}_eventos_total{_etiquetas_prometheus(base)} {valor:g}")
+        lineas += [
+            f"# HELP {PREFIJO}_inicio_segundos Momento de inicio del proceso (epoch)",
+            f"# TYPE {PREFIJO}_inicio_segundos gauge",
+            f"{PREFIJO}_inicio_segundos {self.inicio:.0f}",
+        ]
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self, ruta):
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            archivo.write(self.texto_prometheus())
+        os.replace(temporal, ruta)
+
+
+METRICAS = Metricas()
+medir = METRICAS.medir
+contar = METRICAS.contar
+observar = METRICAS.observar
+
+_exportador = None
+_bloqueo_exportador = threading.Lock()
+
+
+def iniciar_exportacion(ruta=None, intervalo=INTERVALO_EXPORTACION):
+    # Un solo hilo por proceso; sin ruta configurada no hace nada
+    global _exportador
+    ruta = ruta or os.environ.get(VARIABLE_ARCHIVO)
+    if not ruta:
+        return
+    with _bloqueo_exportador:
+        if _exportador is not None:
+            return
+
+        def exportar_continuamente():
+            while True:
+                time.sleep(intervalo)
+                try:
+                    METRICAS.exportar(ruta)
+                except OSError:
+                    registro.exception("No se pudo escribir %s", ruta)
+
+        _exportador = threading.Thread(target=exportar_continuamente, name="metricas", daemon=True)
+        _exportador.start()
@@ -0,0 +1,212 @@
+# === PRUEBA DE CARGA DEL FORMULARIO ===
+# Uso: python prueba_carga.py [--encuestados 50] [--concurrencia 10] [--salida reporte.json]
+#
+# Simula comerciantes que llenan app.py al mismo tiempo con AppTest de
+# Streamlit, sin navegador ni conexión: cada encuestado abre el formulario,
+# contesta pregunta por pregunta (una recarga por respuesta) y lo envía. Los
+# envíos van al almacenamiento simulado de almacenamiento.py, que imita la
+# latencia y la cuota de Google Sheets.
+#
+# Reporta p50/p95/p99 de la carga inicial, de cada recarga y del envío, el
+# rendimiento total y cuántas filas llegaron al almacenamiento. Las
+# respuestas dependen solo de --semilla, así dos reportes son comparables.
+#
+# AppTest no es seguro entre hilos: cada run() arma y desarma estado global
+# de Streamlit, y dos a la vez fallan dentro de AppTest (KeyError en
+# element_tree, "Runtime hasn't been created"), no en app.py. Los
+# encuestados se turnan para usarlo y solo se mide el trabajo de la app, no
+# la espera del turno; mientras uno contesta, la cola de envíos escribe en
+# segundo plano lo que enviaron los demás.
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+from almacenamiento import crear_almacenamiento, descartar_memoria
+from catalogo import PREGUNTAS
+from datos_sinteticos import respuestas_aleatorias
+from limitador import CuboTokens
+
+DIRECTORIO_APP = os.path.dirname(os.path.abspath(__file__))
+RUTA_APP = os.path.join(DIRECTORIO_APP, "app.py")
+BOTON_ENVIAR = "Enviar formulario"
+TIEMPO_MAXIMO = 120
+PERCENTILES = (50, 95, 99)
+TURNO_APPTEST = threading.Lock()
+
+
+def resumen(valores):
+    # Milisegundos; None si no hubo mediciones
+    if not valores:
+        return None
+    datos = np.asarray(valores) * 1000
+    salida = {f"p{p}": round(float(np.percentile(datos, p)), 1) for p in PERCENTILES}
+    salida.update(n=len(valores), media=round(float(datos.mean()), 1), maximo=round(float(datos.max()), 1))
+    return salida
+
+
+def _widget(prueba, pregunta):
+    # AppTest agrupa los widgets por tipo; las preguntas ocultas no aparecen
+    for widget in getattr(prueba, pregunta.control):
+        if widget.key == pregunta.id:
+            return widget
+    return None
+
+
+def encuestado(indice, semilla, pausa):
+    respuestas = respuestas_aleatorias(random.Random(semilla * 100_003 + indice))
+    resultado = {"recargas": [], "carga": None, "envio": None, "enviado": False, "error": None}
+    try:
+        with TURNO_APPTEST:
+            prueba = AppTest.from_file(RUTA_APP, default_timeout=TIEMPO_MAXIMO)
+            inicio = time.perf_counter()
+            prueba.run()
+            resultado["carga"] = time.perf_counter() - inicio
+
+        # En el orden de la página, así las preguntas dependientes ya son visibles
+        for pregunta in PREGUNTAS:
+            if not pregunta.control:
+                continue
+            if pausa:
+                time.sleep(pausa)
+            with TURNO_APPTEST:
+                widget = _widget(prueba, pregunta)
+                if widget is None:
+                    continue
+                widget.set_value(respuestas[pregunta.id])
+                inicio = time.perf_counter()
+                prueba.run()
+                resultado["recargas"].append(time.perf_counter() - inicio)
+
+        with TURNO_APPTEST:
+            # El mapa es un componente que AppTest no puede pulsar
+            prueba.session_state["ubicacion"] = respuestas["ubicacion"]
+            boton = next(b for b in prueba.button if b.label == BOTON_ENVIAR)
+            inicio = time.perf_counter()
+            boton.click().run()
+            resultado["envio"] = time.perf_counter() - inicio
+            resultado["enviado"] = any("enviado correctamente" in aviso.value for aviso in prueba.success)
+            if prueba.exception:
+                resultado["error"] = prueba.exception[0].message
+    except Exception as error:
+        resultado["error"] = repr(error)
+    return resultado
+
+
+def ejecutar(encuestados, concurrencia, semilla, pausa, latencia_escritura, escrituras_por_minuto, espera_vaciado):
+    # La cola SQLite se crea en un directorio temporal y no toca la del proyecto
+    directorio = tempfile.mkdtemp(prefix="prueba_carga_")
+    # Otra prueba en el mismo proceso deja su cola (en un directorio ya
+    # borrado) en st.cache_resource y sus filas en la hoja simulada
+    streamlit.cache_resource.clear()
+    descartar_memoria()
+    # El directorio y el tipo de almacenamiento se restauran aunque la prueba falle
+    anterior = os.getcwd()
+    tipo_anterior = os.environ.get("ENCUESTA_ALMACENAMIENTO")
+    os.chdir(directorio)
+    os.environ["ENCUESTA_ALMACENAMIENTO"] = "memoria"
+    try:
+        almacen = crear_almacenamiento(tipo="memoria")
+        almacen.latencia_escritura = latencia_escritura
+        almacen.cuotas["escritura"] = escrituras_por_minuto
+        almacen.limitador = CuboTokens(escrituras_por_minuto) if escrituras_por_minuto else None
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as grupo:
+            resultados = list(grupo.map(lambda i: encuestado(i, semilla, pausa), range(encuestados)))
+        duracion = time.perf_counter() - inicio
+
+        enviados = sum(r["enviado"] for r in resultados)
+        # La cola escribe en segundo plano; se espera a que se vacíe
+        limite = time.monotonic() + espera_vaciado
+        while len(almacen.filas) < enviados and time.monotonic() < limite:
+            time.sleep(0.2)
+        vaciado = time.perf_counter() - inicio
+        ids = [fila[-1] for fila in almacen.filas]
+
+        recargas = [t for r in resultados for t in r["recargas"]]
+        errores = [r["error"] for r in resultados if r["error"]]
+    finally:
+        os.chdir(anterior)
+        if tipo_anterior is None:
+            os.environ.pop("ENCUESTA_ALMACENAMIENTO", None)
+        else:
+            os.environ["ENCUESTA_ALMACENAMIENTO"] = tipo_anterior
+        shutil.rmtree(directorio, ignore_errors=True)
+    return {
+        "configuracion": {
+            "encuestados": encuestados,
+            "concurrencia": concurrencia,
+            "semilla": semilla,
+            "pausa_s": pausa,
+            "latencia_escritura_s": latencia_escritura,
+            "escrituras_por_minuto": escrituras_por_minuto,
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "cpus": os.cpu_count(),
+        },
+        "duracion_s": round(duracion, 2),
+        "enviados": enviados,
+        "envios_por_segundo": round(enviados / duracion, 2),
+        "recargas_por_segundo": round(len(recargas) / duracion, 1),
+        "carga_ms": resumen([r["carga"] for r in resultados if r["carga"] is not None]),
+        "recarga_ms": resumen(recargas),
+        "envio_ms": resumen([r["envio"] for r in resultados if r["envio"] is not None]),
+        "filas_almacenadas": len(almacen.filas),
+        "filas_duplicadas": len(ids) - len(set(ids)),
+        "filas_perdidas": enviados - len(set(ids)),
+        "vaciado_s": round(vaciado, 2),
+        "llamadas_almacenamiento": dict(almacen.llamadas),
+        "errores": errores[:10],
+    }
+
+
+def imprimir(reporte):
+    configuracion = reporte["configuracion"]
+    print(f"{configuracion['encuestados']} encuestados, {configuracion['concurrencia']} a la vez, "
+          f"semilla {configuracion['semilla']}")
+    print(f"{'':<10}{'p50':>9}{'p95':>9}{'p99':>9}{'máx':>9}{'n':>7}")
+    for nombre, clave in (("carga", "carga_ms"), ("recarga", "recarga_ms"), ("envío", "envio_ms")):
+        datos = reporte[clave]
+        if datos:
+            print(f"{nombre:<10}{datos['p50']:>9}{datos['p95']:>9}{datos['p99']:>9}{datos['maximo']:>9}{datos['n']:>7}")
+    print(f"Duración: {reporte['duracion_s']} s · {reporte['envios_por_segundo']} envíos/s · "
+          f"{reporte['recargas_por_segundo']} recargas/s")
+    print(f"Filas almacenadas: {reporte['filas_almacenadas']} de {reporte['enviados']} enviadas "
+          f"(duplicadas {reporte['filas_duplicadas']}, perdidas {reporte['filas_perdidas']}, "
+          f"cola vacía a los {reporte['vaciado_s']} s)")
+    for error in reporte["errores"]:
+        print("Error:", error)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga del formulario con AppTest y almacenamiento simulado.")
+    parser.add_argument("--encuestados", type=int, default=50, help="Total de formularios a llenar")
+    parser.add_argument("--concurrencia", type=int, default=10, help="Encuestados simultáneos")
+    parser.add_argument("--semilla", type=int, default=1, help="Semilla de las respuestas")
+    parser.add_argument("--pausa", type=float, default=0.0, help="Segundos entre respuestas de un encuestado")
+    parser.add_argument("--latencia-escritura", type=float, default=0.6, help="Segundos por append simulado")
+    parser.add_argument("--escrituras-por-minuto", type=int, default=60, help="Cuota simulada (0 = sin cuota)")
+    parser.add_argument("--espera-vaciado", type=float, default=60.0, help="Segundos máximos para vaciar la cola")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el reporte")
+    argumentos = parser.parse_args()
+
+    reporte = ejecutar(
+        argumentos.encuestados, argumentos.concurrencia, argumentos.semilla, argumentos.pausa,
+        argumentos.latencia_escritura, argumentos.escrituras_por_minuto or None, argumentos.espera_vaciado,
+    )
+    imprimir(reporte)
+    if argumentos.salida:
+        with open(argumentos.salida, "w", encoding="utf-8") as archivo:
+            json.dump(reporte, archivo, ensure_ascii=False, indent=2)
@@ -0,0 +1,82 @@
+# === IMÁGENES ESTÁTICAS PRE-REDIMENSIONADAS ===
+# El banner se decodifica una sola vez por proceso y se guarda en varios
+# anchos (WebP y un JPEG de respaldo) dentro de static/, junto a app.py:
+# Streamlit sirve esa carpeta con server.enableStaticServing y el navegador
+# descarga solo la variante adecuada a su pantalla mediante srcset. Las rutas
+# se resuelven desde la carpeta de la app, no desde el directorio actual.
+
+import os
+
+from PIL import Image
+
+DIRECTORIO_APP = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_ESTATICO = os.path.join(DIRECTORIO_APP, "static")
+URL_ESTATICA = "app/static"
+ANCHOS = (480, 960, 1600)
+ANCHO_RESPALDO = 960
+CALIDAD = 80
+FONDO_JPEG = (44, 81, 122)  # #2C517A, mismo fondo de la página
+
+
+def _nombre_base(ruta):
+    return os.path.basename(ruta).replace(".", "_")
+
+
+def _desactualizado(destino, origen):
+    return not os.path.exists(destino) or os.path.getmtime(destino) < os.path.getmtime(origen)
+
+
+def _redimensionar(imagen, ancho):
+    alto = round(imagen.height * ancho / imagen.width)
+    return imagen.resize((ancho, alto), Image.LANCZOS) if ancho < imagen.width else imagen
+
+
+def generar_variantes(ruta, anchos=ANCHOS, directorio=DIRECTORIO_ESTATICO):
+    # Devuelve {"webp": [(ancho, archivo), ...], "jpeg": archivo}
+    ruta = os.path.join(DIRECTORIO_APP, ruta)
+    os.makedirs(directorio, exist_ok=True)
+    base = _nombre_base(ruta)
+    with Image.open(ruta) as original:
+        original.load()
+        # Anchos casi iguales al original no justifican otra variante
+        anchos = sorted({ancho if ancho < original.width * 0.9 else original.width for ancho in anchos})
+
+        webp = []
+        for ancho in anchos:
+            archivo = f"{base}-{ancho}.webp"
+            destino = os.path.join(directorio, archivo)
+            if _desactualizado(destino, ruta):
+                _redimensionar(original, ancho).save(destino, "WEBP", quality=CALIDAD, method=6)
+            webp.append((ancho, archivo))
+
+        ancho_jpeg = min(ANCHO_RESPALDO, original.width)
+        jpeg = f"{base}-{ancho_jpeg}.jpg"
+        destino = os.path.join(directorio, jpeg)
+        if _desactualizado(destino, ruta):
+            imagen = _redimensionar(original, ancho_jpeg)
+            if imagen.mode in ("RGBA", "LA", "P"):
+                fondo = Image.new("RGB", imagen.size, FONDO_JPEG)
+                fondo.paste(imagen.convert("RGBA"), mask=imagen.convert("RGBA").split()[-1])
+                imagen = fondo
+            imagen.convert("RGB").save(destino, "JPEG", quality=CALIDAD, optimize=True, progressive=True)
+
+    return {"webp": webp, "jpeg": jpeg}
+
+
+def html_imagen(variantes, clase="", alt="", tamanos="100vw"):
+    srcset = ", ".join(f"{URL_ESTATICA}/{archivo} {ancho}w" for ancho, archivo in variantes["webp"])
+    return (
+        f'<picture class="{clase}">'
+        f'<source type="image/webp" srcset="{srcset}" sizes="{tamanos}">'
+        f'<img src="{URL_ESTATICA}/{variantes["jpeg"]}" alt="{alt}" loading="eager" decoding="async">'
+        f'</picture>'
+    )
+
+
+def ruta_variante_menor(variantes, ancho_minimo=ANCHO_RESPALDO, directorio=DIRECTORIO_ESTATICO):
+    # Para cuando no hay servicio de archivos estáticos: la menor variante WebP
+    # que cubra ancho_minimo
+    for ancho, archivo in variantes["webp"]:
+        if ancho >= ancho_minimo:
+            return os.path.join(directorio, archivo)
+    return os.path.join(directorio, variantes["webp"][-1][1])
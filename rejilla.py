@@ -0,0 +1,157 @@
+# === REJILLA ESPACIAL (GEOHASH) ===
+# Cada respuesta con coordenadas se asigna una vez por versión de los datos a
+# una celda geohash, y los conteos por celda de cada capa del mapa se calculan
+# en ese momento. El mapa dibuja celdas y no respuestas: su tamaño depende del
+# área cubierta, no de cuántos formularios se reciban.
+#
+# Las celdas se guardan como enteros (los bits intercalados del geohash), así
+# la celda padre de menor precisión es un corrimiento de 5 bits:
+#   PRECISION_CALOR  7 caracteres, ~150 m × 150 m: puntos de los mapas de calor
+#   PRECISION_ZONAS  6 caracteres, ~1,2 km × 0,6 km: polígonos coloreados
+
+import numpy as np
+import pandas as pd
+
+from catalogo import PREGUNTAS_POR_ID, COLUMNA_LATITUD, COLUMNA_LONGITUD
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION_CALOR = 7
+PRECISION_ZONAS = 6
+
+FORMULARIOS = "Formularios"
+VICTIMIZACION = "% víctimas de delito"
+INSEGURIDAD = "% percepción insegura"
+COLUMNA_VICTIMA = PREGUNTAS_POR_ID["victima"].columna
+RESPUESTAS_VICTIMA = PREGUNTAS_POR_ID["victima"].opciones[:2]
+COLUMNA_PERCEPCION = PREGUNTAS_POR_ID["percepcion_seguridad"].columna
+RESPUESTAS_INSEGURAS = PREGUNTAS_POR_ID["percepcion_seguridad"].opciones[3:]
+# Una capa de calor por pregunta de delitos: cuenta quien marcó al menos una opción
+CAPAS_DELITO = [
+    PREGUNTAS_POR_ID[id_pregunta].columna
+    for id_pregunta in ["asaltos", "robos", "estafas", "venta_drogas", "delitos_zona", "delitos_vida", "delitos_sexuales"]
+]
+
+
+def codificar_geohash(latitud, longitud, precision=PRECISION_CALOR):
+    # Geohash como entero; -1 para coordenadas vacías o fuera de rango
+    latitud = np.asarray(latitud, dtype="float64")
+    longitud = np.asarray(longitud, dtype="float64")
+    bits = 5 * precision
+    bits_lon, bits_lat = (bits + 1) // 2, bits // 2
+    validas = (np.abs(latitud) <= 90) & (np.abs(longitud) <= 180)
+    lat = np.where(validas, latitud, 0.0)
+    lon = np.where(validas, longitud, 0.0)
+    celda_lat = np.minimum(((lat + 90) / 180 * (1 << bits_lat)).astype("int64"), (1 << bits_lat) - 1)
+    celda_lon = np.minimum(((lon + 180) / 360 * (1 << bits_lon)).astype("int64"), (1 << bits_lon) - 1)
+
+    # Bits intercalados desde el más significativo, empezando por la longitud
+    codigos = np.zeros(len(lat), dtype="int64")
+    for posicion in range(bits):
+        if posicion % 2 == 0:
+            bit = (celda_lon >> (bits_lon - 1 - posicion // 2)) & 1
+        else:
+            bit = (celda_lat >> (bits_lat - 1 - posicion // 2)) & 1
+        codigos = (codigos << 1) | bit
+    return np.where(validas, codigos, -1)
+
+
+def _separar_bits(codigos, precision):
+    bits = 5 * precision
+    celda_lat = np.zeros(len(codigos), dtype="int64")
+    celda_lon = np.zeros(len(codigos), dtype="int64")
+    for posicion in range(bits):
+        bit = (codigos >> (bits - 1 - posicion)) & 1
+        if posicion % 2 == 0:
+            celda_lon = (celda_lon << 1) | bit
+        else:
+            celda_lat = (celda_lat << 1) | bit
+    return celda_lat, celda_lon
+
+
+def limites_geohash(codigos, precision=PRECISION_CALOR):
+    # (lat_min, lat_max, lon_min, lon_max) de cada celda
+    codigos = np.asarray(codigos, dtype="int64")
+    bits = 5 * precision
+    alto = 180 / (1 << (bits // 2))
+    ancho = 360 / (1 << ((bits + 1) // 2))
+    celda_lat, celda_lon = _separar_bits(codigos, precision)
+    lat_min = celda_lat * alto - 90
+    lon_min = celda_lon * ancho - 180
+    return lat_min, lat_min + alto, lon_min, lon_min + ancho
+
+
+def texto_geohash(codigos, precision=PRECISION_CALOR):
+    return [
+        "".join(BASE32[(int(codigo) >> (5 * (precision - 1 - caracter))) & 31] for caracter in range(precision))
+        for codigo in codigos
+    ]
+
+
+class RejillaEspacial:
+    def __init__(self, df, indicadores, precision=PRECISION_CALOR):
+        self.precision = precision
+        self.filas = len(df)
+        latitud = pd.to_numeric(df[COLUMNA_LATITUD], errors="coerce") if COLUMNA_LATITUD in df.columns else None
+        longitud = pd.to_numeric(df[COLUMNA_LONGITUD], errors="coerce") if COLUMNA_LONGITUD in df.columns else None
+        if latitud is None or longitud is None:
+            codigos = np.full(self.filas, -1, dtype="int64")
+        else:
+            codigos = codificar_geohash(latitud.to_numpy(dtype="float64"), longitud.to_numpy(dtype="float64"), precision)
+
+        # Posición de la celda de cada fila dentro de self.celdas (-1 sin coordenadas)
+        self.posicion = np.full(self.filas, -1, dtype="int64")
+        con_celda = codigos >= 0
+        self.celdas, self.posicion[con_celda] = np.unique(codigos[con_celda], return_inverse=True)
+
+        # Lo que suma cada fila en cada capa
+        self._pesos = {FORMULARIOS: np.ones(self.filas, dtype=bool)}
+        if COLUMNA_VICTIMA in df.columns:
+            self._pesos[COLUMNA_VICTIMA] = df[COLUMNA_VICTIMA].isin(RESPUESTAS_VICTIMA).to_numpy(dtype=bool)
+        if COLUMNA_PERCEPCION in df.columns:
+            self._pesos[COLUMNA_PERCEPCION] = df[COLUMNA_PERCEPCION].isin(RESPUESTAS_INSEGURAS).to_numpy(dtype=bool)
+        columnas_multiples = set(indicadores.columns.get_level_values(0)) if len(indicadores.columns) else set()
+        for columna in CAPAS_DELITO:
+            if columna in columnas_multiples:
+                self._pesos[columna] = indicadores[columna].sparse.to_dense().to_numpy(dtype=bool).any(axis=1)
+
+        self._conteos = self._contar(None)
+
+    def _contar(self, mascara):
+        posiciones = self.posicion if mascara is None else self.posicion[mascara]
+        con_celda = posiciones >= 0
+        conteos = {}
+        for capa, pesos in self._pesos.items():
+            elegidos = pesos if mascara is None else pesos[mascara]
+            conteos[capa] = np.bincount(
+                posiciones[con_celda], weights=elegidos[con_celda], minlength=len(self.celdas)
+            ).astype("int64")
+        conteos = pd.DataFrame(conteos, index=self.celdas)
+        return conteos[conteos[FORMULARIOS] > 0]
+
+    def conteos(self, mascara=None):
+        # Celda (entero) × capa; sin máscara, los conteos calculados al crear la rejilla
+        return self._conteos if mascara is None else self._contar(mascara)
+
+    def zonas(self, mascara=None, precision=PRECISION_ZONAS):
+        # Celdas agrupadas a menor precisión, con límites y porcentajes para colorear
+        conteos = self.conteos(mascara)
+        padres = conteos.index.to_numpy() >> (5 * (self.precision - precision))
+        zonas = conteos.groupby(padres).sum()
+        lat_min, lat_max, lon_min, lon_max = limites_geohash(zonas.index.to_numpy(), precision)
+        salida = pd.DataFrame({
+            "celda": texto_geohash(zonas.index, precision),
+            "lat_min": lat_min, "lat_max": lat_max, "lon_min": lon_min, "lon_max": lon_max,
+            FORMULARIOS: zonas[FORMULARIOS].to_numpy(),
+        })
+        for capa, columna in ((VICTIMIZACION, COLUMNA_VICTIMA), (INSEGURIDAD, COLUMNA_PERCEPCION)):
+            if columna in zonas.columns:
+                salida[capa] = (100 * zonas[columna] / zonas[FORMULARIOS]).round(1).to_numpy()
+        return salida
+
+    def calor(self, mascara=None):
+        # Centro de cada celda y su conteo por capa, para los mapas de calor
+        conteos = self.conteos(mascara)
+        lat_min, lat_max, lon_min, lon_max = limites_geohash(conteos.index.to_numpy(), self.precision)
+        centros = pd.DataFrame({"lat": (lat_min + lat_max) / 2, "lon": (lon_min + lon_max) / 2})
+        capas = [FORMULARIOS] + [columna for columna in CAPAS_DELITO if columna in conteos.columns]
+        return pd.concat([centros, conteos[capas].reset_index(drop=True)], axis=1)
@@ -0,0 +1,83 @@
+# === RELLENO DE LATITUD Y LONGITUD EN FILAS EXISTENTES ===
+# Uso: python rellenar_coordenadas.py [--simular]
+#
+# Las respuestas anteriores solo tienen el enlace de Google Maps. Este comando
+# extrae las coordenadas de todas las filas de una vez y las escribe en las
+# columnas Latitud y Longitud con un único batch_update. También agrega el
+# encabezado "ID de envío" si falta, para que el dashboard descarte repetidas.
+
+import argparse
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+from catalogo import COLUMNA_UBICACION, COLUMNA_LATITUD, COLUMNA_LONGITUD, COLUMNA_ID_ENVIO
+from conexion_sheets import obtener_hoja
+from espejo_local import PATRON_COORDENADAS
+from limitador import LIMITADOR_ESCRITURAS
+
+
+def _numero_o_vacio(valor):
+    return "" if pd.isna(valor) else float(valor)
+
+
+def rellenar(hoja, simular=False):
+    valores = hoja.get_all_values()
+    if len(valores) < 2:
+        print("La hoja no tiene respuestas.")
+        return 0
+
+    encabezados = list(valores[0])
+    if COLUMNA_UBICACION not in encabezados:
+        raise SystemExit(f"La hoja no tiene la columna '{COLUMNA_UBICACION}'.")
+
+    filas = valores[1:]
+    ancho = len(encabezados)
+    df = pd.DataFrame([(list(fila) + [""] * ancho)[:ancho] for fila in filas])
+
+    # Las columnas que falten se agregan al final, igual que en app.py
+    nuevos_encabezados = []
+    for columna in (COLUMNA_LATITUD, COLUMNA_LONGITUD, COLUMNA_ID_ENVIO):
+        if columna not in encabezados:
+            encabezados.append(columna)
+            nuevos_encabezados.append(columna)
+            df[len(encabezados) - 1] = ""
+
+    posicion_lat = encabezados.index(COLUMNA_LATITUD)
+    posicion_lon = encabezados.index(COLUMNA_LONGITUD)
+    extraidas = df[encabezados.index(COLUMNA_UBICACION)].str.extract(PATRON_COORDENADAS)
+    actuales_lat = pd.to_numeric(df[posicion_lat], errors="coerce")
+    actuales_lon = pd.to_numeric(df[posicion_lon], errors="coerce")
+    latitudes = actuales_lat.fillna(pd.to_numeric(extraidas[0], errors="coerce"))
+    longitudes = actuales_lon.fillna(pd.to_numeric(extraidas[1], errors="coerce"))
+    pendientes = int((actuales_lat.isna() & latitudes.notna()).sum())
+
+    print(f"{len(filas)} filas leídas, {pendientes} filas por completar.")
+    if simular or (pendientes == 0 and not nuevos_encabezados):
+        return pendientes
+
+    if len(encabezados) > hoja.col_count:
+        hoja.add_cols(len(encabezados) - hoja.col_count)
+
+    ultima_fila = len(filas) + 1
+    actualizaciones = [
+        {"range": rowcol_to_a1(1, encabezados.index(columna) + 1), "values": [[columna]]}
+        for columna in nuevos_encabezados
+    ]
+    for posicion, serie in ((posicion_lat, latitudes), (posicion_lon, longitudes)):
+        actualizaciones.append({
+            "range": f"{rowcol_to_a1(2, posicion + 1)}:{rowcol_to_a1(ultima_fila, posicion + 1)}",
+            "values": [[_numero_o_vacio(valor)] for valor in serie],
+        })
+    LIMITADOR_ESCRITURAS.esperar()
+    hoja.batch_update(actualizaciones)
+    print("Coordenadas actualizadas.")
+    return pendientes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Completa Latitud y Longitud a partir del enlace de ubicación.")
+    parser.add_argument("--hoja", default="Respuestas", help="Nombre de la hoja (por defecto: Respuestas)")
+    parser.add_argument("--simular", action="store_true", help="Solo informa cuántas filas se completarían")
+    argumentos = parser.parse_args()
+    rellenar(obtener_hoja(argumentos.hoja), simular=argumentos.simular)
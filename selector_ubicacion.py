@@ -0,0 +1,85 @@
+# === SELECTOR DE UBICACIÓN ===
+# Mapa base creado una sola vez por proceso; el marcador elegido viaja aparte
+# como feature group, así el mapa no se vuelve a construir en cada recarga.
+# st_folium solo devuelve el último clic: mover o acercar el mapa no provoca
+# recargas del script. La posición que encuentra el botón de geolocalización
+# se entrega como un clic en ese punto, así queda elegida sin tener que
+# tocar el mapa.
+
+import threading
+
+import streamlit as st
+import folium
+from branca.element import MacroElement, Template
+from folium.plugins import LocateControl
+from streamlit_folium import st_folium
+from streamlit.errors import StreamlitAPIException
+
+from metricas import medir
+
+CENTRO_MAPA = [10.3, -85.8]
+ZOOM_INICIAL = 13
+DECIMALES = 6  # ~10 cm; clics repetidos en el mismo punto no cuentan como cambio
+
+# st_folium agrega elementos al mapa al renderizarlo; como el mapa es
+# compartido, dos sesiones no pueden renderizarlo al mismo tiempo
+_bloqueo_mapa = threading.Lock()
+
+
+class _UbicacionComoClic(MacroElement):
+    # st_folium escucha el evento click del mapa para last_clicked
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        {{ this._parent.get_name() }}.on("locationfound", function (evento) {
+            {{ this._parent.get_name() }}.fire("click", {latlng: evento.latlng});
+        });
+        {% endmacro %}
+    """)
+
+
+@st.cache_resource
+def _mapa_base():
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=ZOOM_INICIAL)
+    # Botón que centra el mapa con la geolocalización del navegador y la
+    # toma como ubicación elegida
+    LocateControl(
+        strings={"title": "Usar mi ubicación actual"},
+        flyTo=True,
+        keepCurrentZoomLevel=False,
+    ).add_to(mapa)
+    _UbicacionComoClic().add_to(mapa)
+    return mapa
+
+
+def seleccionar_ubicacion(clave="ubicacion", width=700, height=500):
+    # Devuelve [lat, lon] guardado en st.session_state[clave] o None
+    marcador = folium.FeatureGroup(name="Ubicación seleccionada")
+    if st.session_state.get(clave):
+        folium.Marker(
+            location=st.session_state[clave],
+            tooltip="Ubicación seleccionada",
+            icon=folium.Icon(color="blue", icon="map-marker")
+        ).add_to(marcador)
+
+    with _bloqueo_mapa, medir("mapa_selector"):
+        salida = st_folium(
+            _mapa_base(),
+            key=f"mapa_{clave}",
+            width=width,
+            height=height,
+            feature_group_to_add=marcador,
+            returned_objects=["last_clicked"],
+        )
+
+    clic = (salida or {}).get("last_clicked")
+    if clic:
+        nueva = [round(clic["lat"], DECIMALES), round(clic["lng"], DECIMALES)]
+        if nueva != st.session_state.get(clave):
+            st.session_state[clave] = nueva
+            # Solo se repite el fragmento del mapa para mostrar el marcador;
+            # fuera de un fragmento el marcador aparece en la siguiente recarga
+            try:
+                st.rerun(scope="fragment")
+            except StreamlitAPIException:
+                pass
+    return st.session_state.get(clave)
@@ -0,0 +1,190 @@
+# === SERIE TEMPORAL DE RESPUESTAS ===
+# Envíos por día y tendencias de percepción y victimización a partir de la
+# columna "Fecha y hora" que escribe app.py.
+#
+# Se actualiza solo con las filas nuevas: el sincronizador agrega filas al
+# final del DataFrame, así que basta procesar df.iloc[filas:]. Si la última
+# fila procesada ya no coincide (recarga completa de la hoja) se vuelve a
+# empezar. En el dashboard hay una serie por versión de los datos: derivar()
+# copia la anterior y le agrega las filas nuevas sin tocarla, así las sesiones
+# que siguen en otra versión leen la suya y las máscaras siempre coinciden.
+#
+#   marcas   índice ordenado de las fechas (IndiceOrdenado): un rango de
+#            fechas se cuenta con dos búsquedas binarias
+#   diarios  una tabla día × opción por pregunta, sumada lote a lote; las
+#            vistas semanales y las ventanas móviles salen de estas tablas,
+#            que tienen una fila por día y no una por respuesta
+
+import copy
+import threading
+
+import numpy as np
+import pandas as pd
+
+from catalogo import PREGUNTAS_POR_ID, COLUMNA_FECHA, COLUMNA_ID_ENVIO
+from filtros import IndiceOrdenado, fechas_como_numero
+from metricas import medir
+
+COLUMNAS_TENDENCIA = [PREGUNTAS_POR_ID[id_pregunta].columna for id_pregunta in ["percepcion_seguridad", "victima"]]
+TOTAL = "Envíos"
+FRECUENCIAS = {"Día": "D", "Semana": "W-MON"}
+VENTANA_MOVIL = 7
+NS_POR_DIA = 86_400 * 10**9
+
+
+def _dias(marcas):
+    # Días desde epoch; -1 para fechas vacías
+    dias = np.full(len(marcas), -1, dtype="int64")
+    validas = ~np.isnan(marcas)
+    dias[validas] = np.floor(marcas[validas] / NS_POR_DIA).astype("int64")
+    return dias
+
+
+def _tabla_por_dia(dias, codigos, etiquetas):
+    # Conteo día × etiqueta con un solo bincount sobre (día, código)
+    validas = dias >= 0
+    unicos, posiciones = np.unique(dias[validas], return_inverse=True)
+    ancho = len(etiquetas)
+    conteos = np.bincount(posiciones * ancho + codigos[validas], minlength=len(unicos) * ancho)
+    return pd.DataFrame(conteos.reshape(len(unicos), ancho), index=unicos, columns=etiquetas)
+
+
+class SerieTemporal:
+    def __init__(self, columnas=COLUMNAS_TENDENCIA):
+        self.columnas = columnas
+        self._bloqueo = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.filas = 0
+        self.marcas = IndiceOrdenado()
+        self._dias = np.empty(0, dtype="int64")
+        # Por columna: etiquetas vistas (en orden de aparición del catálogo),
+        # código de cada fila y tabla diaria acumulada
+        self._etiquetas = {TOTAL: [TOTAL], **{columna: [] for columna in self.columnas}}
+        self._codigos = {columna: np.empty(0, dtype="int64") for columna in self.columnas}
+        self._diarios = {}
+        self._ultima = None
+
+    def _clave_fila(self, df, posicion):
+        fila = df.iloc[posicion]
+        return tuple(str(fila.get(columna, "")) for columna in (COLUMNA_FECHA, COLUMNA_ID_ENVIO))
+
+    def actualizar(self, df):
+        with self._bloqueo:
+            if self.filas and (len(df) < self.filas or self._clave_fila(df, self.filas - 1) != self._ultima):
+                self._reiniciar()
+            if len(df) == self.filas:
+                return
+            with medir("serie_temporal"):
+                self._agregar(df.iloc[self.filas:])
+                self._ultima = self._clave_fila(df, self.filas - 1)
+
+    def derivar(self, df):
+        # Serie de otra versión de los datos, partiendo de esta. Las tablas y
+        # arreglos se reemplazan (no se modifican) al agregar filas, así que
+        # basta copiar los contenedores
+        with self._bloqueo:
+            nueva = copy.copy(self)
+            nueva._bloqueo = threading.Lock()
+            nueva.marcas = copy.copy(self.marcas)
+            nueva._etiquetas = {columna: list(etiquetas) for columna, etiquetas in self._etiquetas.items()}
+            nueva._codigos = dict(self._codigos)
+            nueva._diarios = dict(self._diarios)
+        nueva.actualizar(df)
+        return nueva
+
+    def _agregar(self, nuevas):
+        # Sin columna de fecha las filas cuentan igual, como fechas vacías: así
+        # las máscaras de los filtros siguen teniendo el largo de df
+        if COLUMNA_FECHA in nuevas.columns:
+            marcas = fechas_como_numero(nuevas[COLUMNA_FECHA])
+        else:
+            marcas = np.full(len(nuevas), np.nan)
+        self.marcas.agregar(marcas)
+        dias = _dias(marcas)
+        self._dias = np.concatenate([self._dias, dias])
+        self.filas += len(nuevas)
+
+        lotes = {TOTAL: _tabla_por_dia(dias, np.zeros(len(dias), dtype="int64"), [TOTAL])}
+        for columna in self.columnas:
+            if columna not in nuevas.columns:
+                continue
+            codigos = self._codificar(columna, nuevas[columna])
+            self._codigos[columna] = np.concatenate([self._codigos[columna], codigos])
+            lotes[columna] = _tabla_por_dia(dias, codigos, self._etiquetas[columna])
+
+        for columna, lote in lotes.items():
+            anterior = self._diarios.get(columna)
+            if anterior is not None:
+                lote = anterior.add(lote, fill_value=0)
+            self._diarios[columna] = lote.reindex(columns=self._etiquetas[columna], fill_value=0).astype("int64")
+
+    def _codificar(self, columna, serie):
+        # Códigos estables entre lotes: una etiqueta nueva se agrega al final
+        etiquetas = self._etiquetas[columna]
+        textos = serie.astype(object).where(serie.notna(), "").astype(str).to_numpy(dtype=object)
+        unicos, posiciones = np.unique(textos, return_inverse=True)
+        orden = list(serie.cat.categories) if isinstance(serie.dtype, pd.CategoricalDtype) else []
+        for etiqueta in sorted(unicos, key=lambda valor: orden.index(valor) if valor in orden else len(orden)):
+            if etiqueta not in etiquetas:
+                etiquetas.append(etiqueta)
+        return np.array([etiquetas.index(valor) for valor in unicos], dtype="int64")[posiciones]
+
+    def contar(self, desde=None, hasta=None, mascara=None):
+        # Envíos entre dos fechas (Timestamp), ambos extremos incluidos; con
+        # máscara, solo entre las filas elegidas
+        desde = None if desde is None else pd.Timestamp(desde).value
+        hasta = None if hasta is None else pd.Timestamp(hasta).value
+        with self._bloqueo:
+            if mascara is None:
+                return self.marcas.contar(desde, hasta)
+            return int(np.count_nonzero(self.marcas.mascara(desde, hasta) & mascara))
+
+    def ultima_fecha(self):
+        maximo = self.marcas.maximo()
+        return None if maximo is None else pd.Timestamp(int(maximo))
+
+    def tabla(self, columna=TOTAL, frecuencia="D", desde=None, hasta=None, mascara=None):
+        # Conteos por período (día o semana) × opción. Sin máscara se usan las
+        # tablas acumuladas; con máscara (otros filtros activos) se cuentan
+        # solo las filas elegidas, igual con un bincount
+        with self._bloqueo:
+            if columna not in self._etiquetas or (columna != TOTAL and columna not in self._diarios):
+                return pd.DataFrame()
+            etiquetas = list(self._etiquetas[columna])
+            if mascara is None:
+                diarios = self._diarios.get(columna, pd.DataFrame(columns=etiquetas))
+            else:
+                codigos = np.zeros(self.filas, dtype="int64") if columna == TOTAL else self._codigos[columna]
+                diarios = _tabla_por_dia(self._dias[mascara], codigos[mascara], etiquetas)
+
+        # Los días están ordenados: el rango se recorta con búsqueda binaria
+        dias = diarios.index.to_numpy()
+        inicio = 0 if desde is None else np.searchsorted(dias, pd.Timestamp(desde).value // NS_POR_DIA, side="left")
+        fin = len(dias) if hasta is None else np.searchsorted(dias, pd.Timestamp(hasta).value // NS_POR_DIA, side="right")
+        diarios = diarios.iloc[inicio:fin]
+        diarios = diarios.loc[:, [etiqueta for etiqueta in etiquetas if etiqueta != ""]]
+        if diarios.empty:
+            return diarios
+
+        # Días sin envíos en cero, así las ventanas móviles cuentan días de calendario
+        completos = np.arange(diarios.index[0], diarios.index[-1] + 1)
+        diarios = diarios.reindex(completos, fill_value=0)
+        diarios.index = pd.to_datetime(diarios.index, unit="D")
+        diarios.index.name = "Fecha"
+        if frecuencia != "D":
+            diarios = diarios.resample(frecuencia, label="left", closed="left").sum()
+        return diarios
+
+
+def media_movil(tabla, ventana=VENTANA_MOVIL):
+    return tabla.rolling(ventana, min_periods=1).mean()
+
+
+def proporciones(tabla, ventana=None):
+    # Porcentaje de cada opción por período; con ventana, sobre la suma móvil
+    if ventana:
+        tabla = tabla.rolling(ventana, min_periods=1).sum()
+    totales = tabla.sum(axis=1)
+    return tabla.div(totales.where(totales > 0), axis=0).mul(100).round(1)
@@ -0,0 +1,272 @@
+# === SINCRONIZACIÓN INCREMENTAL DE RESPUESTAS ===
+# Mantiene en memoria las respuestas ya descargadas y, en cada actualización,
+# pide al almacenamiento (almacenamiento.py) solo las filas nuevas. Si cambian los encabezados o la última
+# fila conocida ya no coincide (filas borradas o reordenadas) se recarga todo.
+# Con un espejo local el estado sobrevive a reinicios: se arranca desde los
+# lotes Parquet y solo se piden a la hoja las filas posteriores.
+# Las filas cuyo ID de envío ya se vio se descartan: un append que la API
+# aplicó pero cuya respuesta se perdió vuelve a enviarse y no debe contar dos
+# veces. "filas" sigue contando las filas de la hoja, con repetidas incluidas.
+# Antes de leer se sondea la revisión del almacenamiento (modifiedTime en
+# Drive o cantidad de filas); si no cambió desde la última sincronización no
+# se piden filas. Cada MAXIMO_SIN_SINCRONIZAR segundos se lee igual, por si
+# la revisión llega atrasada.
+# El espejo puede ser compartido por varios procesos: antes de leer la hoja
+# se toman, bajo su bloqueo, los lotes que otro proceso ya escribió, y si ese
+# proceso ya leyó la revisión actual no se lee la hoja.
+# Cada lectura verifica que los encabezados sigan el orden del catálogo
+# (catalogo.verificar_encabezados); si no, se detiene con un error en lugar
+# de servir respuestas mezcladas.
+
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+from gspread.utils import numericise_all
+
+from catalogo import COLUMNAS, COLUMNA_ID_ENVIO, EncabezadosIncompatibles, verificar_encabezados
+from espejo_local import tipar_respuestas, unir_respuestas
+from metricas import contar, medir
+
+MAXIMO_SIN_SINCRONIZAR = 300
+
+registro = logging.getLogger("encuesta.sincronizacion")
+
+
+def _sin_vacios_finales(fila):
+    fila = list(fila)
+    while fila and fila[-1] == "":
+        fila.pop()
+    return fila
+
+
+class SincronizadorRespuestas:
+    def __init__(self, almacenamiento, espejo=None):
+        self.almacenamiento = almacenamiento
+        self.espejo = espejo
+        self.encabezados = []
+        self.filas = 0
+        self.df = pd.DataFrame()
+        # Aumenta cada vez que cambia df; sirve de clave para los cálculos derivados
+        self.version = 0
+        self._ultima_fila = []
+        self._ids_envio = set()
+        self._bloqueo = threading.Lock()
+        # Revisión del almacenamiento en la última sincronización correcta
+        self.revision = None
+        self._sincronizado = 0.0
+        # Lotes del espejo ya cargados en df y generación a la que pertenecen
+        self._lotes = 0
+        self._generacion = None
+        # Últimos encabezados comparados con el catálogo (se avisa una vez)
+        self._encabezados_revisados = None
+
+        if espejo is not None:
+            with espejo.bloqueo():
+                if self._ponerse_al_dia(espejo.estado()):
+                    # Un reinicio sin cambios en la hoja no vuelve a leerla
+                    self._sincronizado = time.monotonic()
+
+    def _ponerse_al_dia(self, estado):
+        # Carga los lotes del espejo que aún no están en df (escritos por
+        # otro proceso o antes de un reinicio); devuelve False si no hay estado
+        if not estado:
+            return False
+        lotes = estado.get("lotes", [])
+        nuevo = None
+        if estado.get("generacion") != self._generacion or len(lotes) < self._lotes:
+            # Otro proceso recargó todo: los lotes ya cargados no sirven
+            self.df = nuevo = self.espejo.leer(estado=estado)
+            self._ids_envio = set()
+        elif len(lotes) > self._lotes:
+            nuevo = self.espejo.leer(self._lotes, estado)
+            # Solo los lotes nuevos se tipan al leerlos; igual que en _actualizar
+            self.df = unir_respuestas(self.df, nuevo)
+        if nuevo is not None:
+            if COLUMNA_ID_ENVIO in nuevo.columns:
+                self._ids_envio.update(set(nuevo[COLUMNA_ID_ENVIO].astype(str)) - {""})
+            self.version += 1
+        self._lotes, self._generacion = len(lotes), estado.get("generacion")
+        self.encabezados = estado["encabezados"]
+        self.filas = estado["filas"]
+        self._ultima_fila = estado["ultima_fila"]
+        self.revision = estado.get("revision")
+        return True
+
+    def sondear(self):
+        # Revisión actual del almacenamiento, o None si el sondeo falla
+        try:
+            with medir("sondeo"):
+                return self.almacenamiento.revision()
+        except Exception:
+            contar("sondeo_fallido")
+            return None
+
+    def _sin_cambios(self, revision):
+        return (
+            revision is not None and revision == self.revision and bool(self.encabezados)
+            and time.monotonic() - self._sincronizado < MAXIMO_SIN_SINCRONIZAR
+        )
+
+    def actualizar(self, revision=None):
+        # revision: la de un sondeo reciente hecho por quien llama; sin ella
+        # se sondea aquí
+        with self._bloqueo:
+            if revision is None:
+                revision = self.sondear()
+            if self._sin_cambios(revision):
+                contar("sondeo_sin_cambios")
+                return self.df
+            anterior = self.revision
+            # Misma revisión pero pasó MAXIMO_SIN_SINCRONIZAR: se lee la hoja sí o sí
+            forzada = revision is not None and revision == self.revision
+            try:
+                with medir("sincronizar"):
+                    if self.espejo is None:
+                        self.revision = revision
+                        self._actualizar()
+                    else:
+                        with self.espejo.bloqueo():
+                            self._ponerse_al_dia(self.espejo.estado())
+                            if not forzada and revision is not None and revision == self.revision:
+                                # Otro proceso ya leyó esta revisión y dejó sus lotes
+                                contar("espejo_compartido")
+                            else:
+                                # Se asigna antes para que el estado del espejo la guarde
+                                self.revision = revision
+                                self._actualizar()
+                                estado = self.espejo.estado() or {}
+                                self._lotes, self._generacion = len(estado.get("lotes", [])), estado.get("generacion")
+                self._sincronizado = time.monotonic()
+            except EncabezadosIncompatibles:
+                # No es un corte de conexión: servir el espejo ocultaría el problema
+                self.revision = anterior
+                contar("encabezados_incompatibles")
+                raise
+            except Exception:
+                self.revision = anterior
+                # Sin conexión se sirve lo que ya está en el espejo
+                contar("sincronizacion_fallida")
+                if self.df.empty:
+                    raise
+            return self.df
+
+    def instantanea(self, con_clave=False):
+        # con_clave agrega una clave igual en todos los procesos que comparten
+        # el espejo y tienen los mismos datos (para CacheDisco); version es
+        # solo de este proceso
+        with self._bloqueo:
+            if not con_clave:
+                return self.df, self.version
+            if self.espejo is None:
+                clave = f"proceso-{os.getpid()}-{self.version}"
+            else:
+                clave = f"{self._generacion}-{self.filas}-{self.revision}"
+            return self.df, self.version, clave
+
+    def _estado(self):
+        return {
+            "encabezados": self.encabezados, "filas": self.filas, "ultima_fila": self._ultima_fila,
+            "revision": self.revision,
+        }
+
+    def _columnas(self):
+        # El formulario escribe por posición, así que las posiciones del
+        # catálogo llevan siempre sus nombres aunque la hoja use otro texto,
+        # tenga encabezados vacíos (get_values rellena con "") o aún no tenga
+        # los nuevos ("ID de envío" hasta correr rellenar_coordenadas.py).
+        # Después del catálogo se usan los de la hoja
+        encabezados = _sin_vacios_finales(self.encabezados)
+        if encabezados != self._encabezados_revisados:
+            self._encabezados_revisados = encabezados
+            distintos = [
+                f"{posicion + 1}: '{nombre}'" for posicion, nombre in enumerate(encabezados[:len(COLUMNAS)])
+                if nombre not in ("", COLUMNAS[posicion])
+            ]
+            if distintos:
+                contar("encabezados_distintos")
+                registro.warning("Encabezados de la hoja distintos del catálogo, se leen por posición: %s",
+                                 ", ".join(distintos))
+        extras = [
+            nombre if nombre and nombre not in COLUMNAS and encabezados.count(nombre) == 1 else f"Columna {posicion + 1}"
+            for posicion, nombre in enumerate(encabezados[len(COLUMNAS):], start=len(COLUMNAS))
+        ]
+        return COLUMNAS + extras
+
+    def _a_dataframe(self, filas):
+        # Igual que get_all_records: completa celdas faltantes y convierte números
+        with medir("construir_dataframe"):
+            columnas = self._columnas()
+            ancho = len(columnas)
+            registros = [numericise_all((list(f) + [""] * ancho)[:ancho], default_blank="") for f in filas]
+            df = pd.DataFrame(registros, columns=columnas)
+            return tipar_respuestas(df) if self.espejo is not None else df
+
+    def _sin_repetidas(self, df):
+        # Las filas anteriores al ID de envío (vacío) se conservan todas
+        if COLUMNA_ID_ENVIO not in df.columns:
+            return df
+        ids = df[COLUMNA_ID_ENVIO].astype(str)
+        con_id = ids.ne("")
+        # isin con un set grande lo copia entero; se consulta el set fila por fila
+        ya_vistas = pd.Series([valor in self._ids_envio for valor in ids], index=ids.index, dtype=bool)
+        repetidas = con_id & (ids.duplicated() | ya_vistas)
+        self._ids_envio.update(ids[con_id])
+        return df[~repetidas].reset_index(drop=True) if repetidas.any() else df
+
+    def _recargar_todo(self):
+        valores = self.almacenamiento.leer_todo()
+        if not valores:
+            self.encabezados, self.filas, self._ultima_fila = [], 0, []
+            self.df = pd.DataFrame()
+            return
+        # Si la hoja no sigue el orden del catálogo no se carga nada
+        verificar_encabezados(valores[0])
+        self.encabezados = valores[0]
+        filas = valores[1:]
+        self.filas = len(filas)
+        self._ultima_fila = _sin_vacios_finales(filas[-1]) if filas else []
+        self._ids_envio = set()
+        self.df = self._sin_repetidas(self._a_dataframe(filas)) if filas else pd.DataFrame()
+        self.version += 1
+        if self.espejo is not None:
+            self.espejo.reemplazar(self.df, self._estado())
+
+    def _actualizar(self):
+        if not self.encabezados:
+            self._recargar_todo()
+            return
+
+        # Una sola lectura: encabezados, última fila conocida y filas nuevas
+        encabezados, filas = self.almacenamiento.leer_desde(max(self.filas - 1, 0))
+        verificar_encabezados(encabezados)
+        if self.filas:
+            ultima = _sin_vacios_finales(filas[0]) if filas else []
+            nuevas = filas[1:]
+        else:
+            ultima, nuevas = [], filas
+
+        if _sin_vacios_finales(encabezados) != _sin_vacios_finales(self.encabezados) or (
+            self.filas and ultima != self._ultima_fila
+        ):
+            self._recargar_todo()
+            return
+
+        if not nuevas:
+            return
+        self.filas += len(nuevas)
+        self._ultima_fila = _sin_vacios_finales(nuevas[-1])
+        nuevo_df = self._sin_repetidas(self._a_dataframe(nuevas))
+        if nuevo_df.empty:
+            if self.espejo is not None:
+                self.espejo.agregar_lote(nuevo_df, self._estado())
+            return
+        if self.espejo is not None:
+            # Solo nuevo_df se tipó; las categorías se unen sin recorrer lo anterior
+            self.df = unir_respuestas(self.df, nuevo_df)
+            self.espejo.agregar_lote(nuevo_df, self._estado())
+        else:
+            self.df = nuevo_df if self.df.empty else pd.concat([self.df, nuevo_df], ignore_index=True)
+        self.version += 1
@@ -0,0 +1,83 @@
+# === PRUEBAS DE LA COLA DE ENVÍOS ===
+# Uso: python -m pytest test_cola_envios.py
+# Con AlmacenamientoMemoria sin latencia ni cuota; las esperas de reintento
+# se acortan para que las pruebas no tarden.
+
+import time
+
+import pytest
+
+import cola_envios
+from almacenamiento import AlmacenamientoMemoria
+from cola_envios import ColaEnvios
+
+
+class ErrorApi(Exception):
+    # Misma forma que gspread.exceptions.APIError para limitador.codigo_http
+    def __init__(self, codigo):
+        super().__init__(f"Error {codigo}")
+        self.response = type("Respuesta", (), {"status_code": codigo})()
+
+
+class HojaConErrores(AlmacenamientoMemoria):
+    def __init__(self):
+        super().__init__(latencia_lectura=0, latencia_escritura=0, lecturas_por_minuto=None,
+                         escrituras_por_minuto=None)
+        self.venenosa = None
+        self.hoja_rota = False
+
+    def agregar_filas(self, filas):
+        if self.hoja_rota:
+            raise ErrorApi(400)
+        if any(fila[0] == self.venenosa for fila in filas):
+            raise ErrorApi(400)
+        super().agregar_filas(filas)
+
+
+def esperar(condicion, limite=10.0):
+    inicio = time.monotonic()
+    while not condicion():
+        if time.monotonic() - inicio > limite:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+@pytest.fixture
+def hoja(monkeypatch):
+    monkeypatch.setattr(cola_envios, "espera_con_jitter", lambda intento: 0.05)
+    return HojaConErrores()
+
+
+def test_fila_venenosa_se_aparta(hoja, tmp_path):
+    hoja.venenosa = "2"
+    cola = ColaEnvios(hoja, ruta=str(tmp_path / "cola.db"), intervalo=0.05)
+    for numero in range(5):
+        cola.encolar([str(numero)])
+
+    assert esperar(lambda: cola.pendientes() == 0)
+    assert [fila[0] for fila in hoja.filas] == ["0", "1", "3", "4"]
+    assert cola.rechazados() == 1
+
+    hoja.venenosa = None
+    assert cola.reintentar_rechazados() == 1
+    assert esperar(lambda: cola.pendientes() == 0)
+    assert [fila[0] for fila in hoja.filas] == ["0", "1", "3", "4", "2"]
+    assert cola.rechazados() == 0
+
+
+def test_error_de_hoja_no_aparta_filas(hoja, tmp_path):
+    hoja.hoja_rota = True
+    cola = ColaEnvios(hoja, ruta=str(tmp_path / "cola.db"), intervalo=0.05)
+    for numero in range(5):
+        cola.encolar([str(numero)])
+
+    time.sleep(1.0)
+    assert cola.rechazados() == 0
+    assert cola.pendientes() == 5
+
+    # La fila que quedó en sospecha puede escribirse después de las demás
+    hoja.hoja_rota = False
+    assert esperar(lambda: cola.pendientes() == 0)
+    assert sorted(fila[0] for fila in hoja.filas) == ["0", "1", "2", "3", "4"]
+    assert cola.rechazados() == 0
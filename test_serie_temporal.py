@@ -0,0 +1,40 @@
+# === PRUEBAS DE LA SERIE TEMPORAL ===
+# Uso: python -m pytest test_serie_temporal.py
+# Con respuestas sintéticas ya tipadas, como las deja el sincronizador.
+
+import numpy as np
+
+from catalogo import COLUMNA_FECHA
+from datos_sinteticos import generar_filas
+from espejo_local import tipar_respuestas
+from graficos import secciones_tiempo, semana_actual
+from materializar import materializar
+from serie_temporal import SerieTemporal
+
+
+def test_sin_columna_de_fecha_las_mascaras_siguen_sirviendo(tmp_path):
+    df = tipar_respuestas(generar_filas(40)).drop(columns=[COLUMNA_FECHA])
+    serie = SerieTemporal()
+    serie.actualizar(df)
+    mascara = (df["Distrito"] == df["Distrito"].iloc[0]).to_numpy()
+
+    assert serie.filas == len(df)
+    assert serie.tabla(mascara=mascara).empty
+    assert semana_actual(serie, mascara) is None
+    assert all(seccion.figura is None for seccion in secciones_tiempo(serie, "Día", mascara=mascara))
+    # Cada distrito de la instantánea usa una máscara
+    assert materializar(df, 1, str(tmp_path))
+
+
+def test_derivar_no_modifica_la_version_anterior():
+    df = tipar_respuestas(generar_filas(300))
+    anterior = SerieTemporal().derivar(df.iloc[:200])
+    tabla_anterior = anterior.tabla()
+    nueva = anterior.derivar(df)
+
+    assert anterior.filas == 200 and nueva.filas == 300
+    assert anterior.tabla().equals(tabla_anterior)
+    assert anterior.tabla(mascara=np.ones(200, dtype=bool)).equals(tabla_anterior)
+    completa = SerieTemporal()
+    completa.actualizar(df)
+    assert nueva.tabla().equals(completa.tabla())
@@ -0,0 +1,50 @@
+# === PRUEBAS DE LA SINCRONIZACIÓN ===
+# Uso: python -m pytest test_sincronizacion.py
+# Con AlmacenamientoMemoria sin latencia ni cuota y sin espejo.
+
+import pytest
+
+from almacenamiento import AlmacenamientoMemoria
+from catalogo import COLUMNAS, EncabezadosIncompatibles
+from datos_sinteticos import generar_filas
+from sincronizacion import SincronizadorRespuestas
+
+
+def hoja_con(encabezados, filas=5):
+    hoja = AlmacenamientoMemoria(encabezados, latencia_lectura=0, latencia_escritura=0,
+                                 lecturas_por_minuto=None, escrituras_por_minuto=None)
+    hoja.filas = generar_filas(filas).to_numpy().tolist()
+    return hoja
+
+
+def test_hoja_en_otro_orden_no_se_carga():
+    encabezados = list(COLUMNAS)
+    encabezados[1], encabezados[2] = encabezados[2], encabezados[1]
+    with pytest.raises(EncabezadosIncompatibles):
+        SincronizadorRespuestas(hoja_con(encabezados)).actualizar()
+
+
+def test_encabezado_conocido_reemplazado_se_detecta_al_actualizar():
+    hoja = hoja_con(COLUMNAS)
+    sincronizador = SincronizadorRespuestas(hoja)
+    sincronizador.actualizar()
+    hoja.encabezados[COLUMNAS.index("Victimización")] = "Otra pregunta"
+    hoja.filas.append(list(hoja.filas[0]))
+    # Con datos ya cargados un error de conexión se ignora; este no
+    with pytest.raises(EncabezadosIncompatibles):
+        sincronizador.actualizar()
+
+
+def test_encabezados_distintos_se_leen_por_posicion():
+    # Otro texto, celdas vacías (get_values) y sin "ID de envío": se usan los
+    # nombres del catálogo y los repetidos se siguen descartando
+    encabezados = list(COLUMNAS[:-1])
+    encabezados[COLUMNAS.index("Edad")] = "Edad (años)"
+    encabezados[COLUMNAS.index("Sexo")] = ""
+    hoja = hoja_con(encabezados + ["", ""])
+    hoja.filas.append(list(hoja.filas[0]))
+    df = SincronizadorRespuestas(hoja).actualizar()
+
+    assert list(df.columns) == COLUMNAS
+    assert len(df) == 5
+    assert df["ID de envío"].is_unique